@@ -0,0 +1,146 @@
+"""Vectorized (NumPy) versions of the attribution and daily-metrics rollups.
+
+Inputs are parallel column arrays, one element per interaction, as read from the
+Parquet snapshot or from columnar chunks of the interactions table. interaction_type is
+passed as integer codes into `type_names` (Arrow dictionary indices, or np.unique output).
+The results match the row-by-row code in app/crud.py.
+"""
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .crud import DEFAULT_TYPE_WEIGHT, MAX_TYPE_WEIGHT_SUM, TYPE_WEIGHTS
+
+def encode(values: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+    """Integer codes and their names for a sequence of strings"""
+    names, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+    return codes, list(names)
+
+def _type_lookup(type_names: Sequence[str], mapping: Dict[str, float], default: float) -> np.ndarray:
+    return np.array([mapping.get(name, default) for name in type_names], dtype=np.float64)
+
+def _group_starts(*sorted_keys: np.ndarray) -> np.ndarray:
+    # Index of the first row of each run of equal keys in already-sorted arrays
+    change = np.zeros(len(sorted_keys[0]), dtype=bool)
+    change[0] = True
+    for key in sorted_keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+def score_attributions(
+    interaction_id: np.ndarray,
+    user_id: np.ndarray,
+    artist_id: np.ndarray,
+    timestamp: np.ndarray,
+    type_code: np.ndarray,
+    type_names: Sequence[str],
+    value: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Attribution row values for every (user, artist) pair present in the columns.
+
+    Every interaction of a pair must be in the input. Returns parallel arrays:
+    user_id, artist_id, score, interaction_count, total_value, last_interaction.
+    """
+    if len(user_id) == 0:
+        empty = np.array([], dtype=np.int64)
+        return {"user_id": empty, "artist_id": empty, "score": np.array([]),
+                "interaction_count": empty, "total_value": np.array([]),
+                "last_interaction": np.array([], dtype="datetime64[us]")}
+    # Timestamp order within each pair, ties in id order (as the stable sort in crud does)
+    order = np.lexsort((interaction_id, timestamp, artist_id, user_id))
+    users, artists, ts = user_id[order], artist_id[order], timestamp[order]
+    starts = _group_starts(users, artists)
+    ends = np.append(starts[1:], len(order))
+    counts = ends - starts
+
+    # Position of each interaction within its pair drives the recency weight
+    position = np.arange(len(order)) - np.repeat(starts, counts)
+    weights = _type_lookup(type_names, TYPE_WEIGHTS, DEFAULT_TYPE_WEIGHT)[type_code[order]]
+    raw = np.add.reduceat(weights / (1.0 + position * 0.1), starts)
+    values = np.nan_to_num(value[order].astype(np.float64), nan=0.0)
+
+    return {
+        "user_id": users[starts],
+        "artist_id": artists[starts],
+        "score": np.minimum(raw / (MAX_TYPE_WEIGHT_SUM * counts), 1.0),
+        "interaction_count": counts,
+        "total_value": np.add.reduceat(values, starts),
+        "last_interaction": ts[ends - 1],
+    }
+
+def daily_metric_totals(
+    user_id: np.ndarray,
+    artist_id: np.ndarray,
+    timestamp: np.ndarray,
+    type_code: np.ndarray,
+    type_names: Sequence[str],
+    value: np.ndarray,
+    days: Sequence[datetime],
+) -> Dict[datetime, Dict[int, dict]]:
+    """Per-day, per-artist counts for the given days.
+
+    The columns must hold the full interaction history, because new_users depends on each
+    pair's first-ever interaction. Returns {day: {artist_id: {views, clicks, purchases,
+    streams, social, revenue, unique_users, new_users}}}; artists with no interactions that
+    day are absent.
+    """
+    result: Dict[datetime, Dict[int, dict]] = {day: {} for day in days}
+    if len(user_id) == 0 or not days:
+        return result
+    day_of = timestamp.astype("datetime64[D]")
+    wanted = np.array([np.datetime64(day.date(), "D") for day in days])
+
+    # First-ever interaction day per (user, artist) pair, mapped back onto every row
+    pair = user_id.astype(np.int64) << 32 | artist_id.astype(np.int64)
+    _, pair_index = np.unique(pair, return_inverse=True)
+    first_day = np.full(pair_index.max() + 1, np.datetime64("9999-12-31", "D"))
+    np.minimum.at(first_day, pair_index, day_of)
+
+    mask = np.isin(day_of, wanted)
+    if not mask.any():
+        return result
+    day_sel, artist_sel, user_sel = day_of[mask], artist_id[mask].astype(np.int64), user_id[mask].astype(np.int64)
+    is_new = first_day[pair_index[mask]] == day_sel
+    types = type_code[mask]
+
+    # One group per (day, artist)
+    width = artist_sel.max() + 1
+    group_key = (day_sel - day_sel.min()).astype(np.int64) * width + artist_sel
+    groups, group = np.unique(group_key, return_inverse=True)
+    n = len(groups)
+
+    def is_type(name: str) -> np.ndarray:
+        if name not in type_names:
+            return np.zeros(len(types), dtype=bool)
+        return types == list(type_names).index(name)
+
+    def count_of(name: str) -> np.ndarray:
+        return np.bincount(group, weights=is_type(name), minlength=n)
+
+    purchase_values = np.where(is_type("purchase"), np.nan_to_num(value[mask], nan=0.0), 0.0)
+    revenue = np.bincount(group, weights=purchase_values, minlength=n)
+
+    # Distinct users per group; a pair is new for the day if its first interaction is that day
+    _, first_row = np.unique(group.astype(np.int64) * (user_sel.max() + 1) + user_sel, return_index=True)
+    member_group = group[first_row]
+    unique_users = np.bincount(member_group, minlength=n)
+    new_users = np.bincount(member_group, weights=is_new[first_row], minlength=n)
+
+    views, clicks, purchases = count_of("view"), count_of("click"), count_of("purchase")
+    streams, social = count_of("stream"), count_of("social")
+    group_day = day_sel.min() + groups // width
+    group_artist = groups % width
+    for g in range(n):
+        day = group_day[g].astype(datetime)  # a date
+        result[datetime(day.year, day.month, day.day)][int(group_artist[g])] = {
+            "views": int(views[g]),
+            "clicks": int(clicks[g]),
+            "purchases": int(purchases[g]),
+            "streams": int(streams[g]),
+            "social": int(social[g]),
+            "revenue": float(revenue[g]),
+            "unique_users": int(unique_users[g]),
+            "new_users": int(new_users[g]),
+        }
+    return result
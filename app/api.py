@@ -1,172 +1,344 @@
-from fastapi import APIRouter, HTTPException, Body, Query, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Body, Query, Depends, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List, Literal, Optional
+import asyncio
 import json
+import logging
 import httpx
-from bs4 import BeautifulSoup
 from .settings import settings
-from .db import get_db
-from .crud import (
+from .db import AsyncSessionLocal, get_async_db, pool_stats
+from .backfill import backfill_daily_metrics
+from .crawler import crawl
+from .export import FORMATS, export_statement, stream_export
+from .extract import extract_events_async
+from .fetch import DEFAULT_HEADERS, fetch_many, normalize_url
+from .http_cache import cached_get, get_response_cache
+from .http_client import get_http_client
+from .insights_cache import ARTIST_METRICS, TOP_ARTISTS, CachedBody, insights_cache
+from .identity_cache import identity_cache_summary
+from .ingest_queue import ingest_queue
+from .ingest import normalize_jsonld_event, normalize_seatgeek_event
+from .ratelimit import CircuitOpenError, upstream
+from .singleflight import SingleFlight
+from . import telemetry
+from .crud_async import (
     create_interaction, 
+    create_interactions_bulk,
     get_top_artists_by_attribution, 
     get_artist_metrics,
-    compute_daily_metrics_for_date
+    rebuild_leaderboard,
+    compute_daily_metrics_for_date,
+    upsert_concerts
 )
-from sqlalchemy.orm import Session
-from datetime import datetime
-from urllib.parse import urljoin, urlparse
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _location_name(item: dict):
+    location = item.get("location")
+    return (location or {}).get("name") if isinstance(location, dict) else location
+
 @router.get("/test")
 async def test():
     return {"message": "TicketScrapingApp API is working!"}
 
 # Scraping endpoints
+SEATGEEK_EVENTS_URL = "https://api.seatgeek.com/2/events"
+
+# Identical concurrent scrapes share one upstream fetch and parse
+scrape_flights = SingleFlight()
+
+def _seatgeek_event(ev: dict) -> dict:
+    performers = [p.get("name") for p in ev.get("performers", []) if p.get("name")]
+    venue = ev.get("venue") or {}
+    return {
+        "id": ev.get("id"),
+        "title": ev.get("title"),
+        "datetime_local": ev.get("datetime_local"),
+        "url": ev.get("url"),
+        "performers": performers,
+        "venue": {
+            "name": venue.get("name"),
+            "city": venue.get("city"),
+            "state": venue.get("state"),
+            "country": venue.get("country"),
+        }
+    }
+
+def _upstream_unavailable(e: CircuitOpenError) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_in) + 1)})
+
+async def _get_seatgeek(client: httpx.AsyncClient, params: dict) -> dict:
+    try:
+        r = await cached_get(client, SEATGEEK_EVENTS_URL, params=params, timeout=15)
+    except CircuitOpenError as e:
+        raise _upstream_unavailable(e)
+    if r.status_code != 200:
+        raise HTTPException(status_code=r.status_code, detail=r.text)
+    return r.json()
+
+async def _fetch_seatgeek(client: httpx.AsyncClient, params: dict) -> dict:
+    results = [_seatgeek_event(ev) for ev in (await _get_seatgeek(client, params)).get("events", [])]
+    return {"count": len(results), "events": results}
+
+async def _persist_seatgeek(events: List[dict]) -> int:
+    # Own session: streamed pages arrive after the request's dependencies are closed
+    async with AsyncSessionLocal() as db:
+        return await upsert_concerts(db, (normalize_seatgeek_event(ev) for ev in events))
+
+async def _fetch_url_events(client: httpx.AsyncClient, url: str) -> dict:
+    try:
+        r = await cached_get(client, url, headers=DEFAULT_HEADERS)
+    except CircuitOpenError as e:
+        raise _upstream_unavailable(e)
+    if r.status_code != 200:
+        raise HTTPException(status_code=r.status_code, detail=f"Fetch failed: {r.text[:200]}")
+    events = [
+        {
+            "name": item.get("name"),
+            "startDate": item.get("startDate"),
+            "location": _location_name(item),
+            "offers": item.get("offers"),
+            "raw": item,
+        }
+        for item in await extract_events_async(r.text)
+    ]
+    return {"count": len(events), "events": events}
+
 @router.get("/scrape/seatgeek")
 async def scrape_seatgeek(
     query: str = Query(..., description="Artist, team, or event search query"),
     per_page: int = Query(20, ge=1, le=100),
     page: int = Query(1, ge=1),
-    client_id: Optional[str] = Query(None, description="SeatGeek client_id if required")
+    client_id: Optional[str] = Query(None, description="SeatGeek client_id if required"),
+    persist: bool = Query(False, description="Upsert the events into the concerts table"),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    db: AsyncSession = Depends(get_async_db)
 ):
     params = {"q": query, "per_page": per_page, "page": page}
     cid = client_id or settings.seatgeek_client_id
     if cid:
         params["client_id"] = cid
-    url = "https://api.seatgeek.com/2/events"
-    async with httpx.AsyncClient(timeout=15) as client:
-        r = await client.get(url, params=params)
-    if r.status_code != 200:
-        raise HTTPException(status_code=r.status_code, detail=r.text)
-    data = r.json()
-    results = []
-    for ev in data.get("events", []):
-        performers = [p.get("name") for p in ev.get("performers", []) if p.get("name")]
-        venue = ev.get("venue") or {}
-        results.append({
-            "id": ev.get("id"),
-            "title": ev.get("title"),
-            "datetime_local": ev.get("datetime_local"),
-            "url": ev.get("url"),
-            "performers": performers,
-            "venue": {
-                "name": venue.get("name"),
-                "city": venue.get("city"),
-                "state": venue.get("state"),
-                "country": venue.get("country"),
-            }
-        })
-    return {"count": len(results), "events": results}
+    key = ("seatgeek", tuple(sorted(params.items())))
+    result = await scrape_flights.do(key, lambda: _fetch_seatgeek(client, params))
+    if persist:
+        persisted = await upsert_concerts(db, (normalize_seatgeek_event(ev) for ev in result["events"]))
+        result = {**result, "persisted": persisted}
+    return result
 
-@router.get("/scrape/url")
-async def scrape_url(url: str = Query(..., description="Event page URL to scrape")):
-    async with httpx.AsyncClient(timeout=20) as client:
-        r = await client.get(url, headers={"User-Agent": "Mozilla/5.0"})
-    if r.status_code != 200:
-        raise HTTPException(status_code=r.status_code, detail=f"Fetch failed: {r.text[:200]}")
-    soup = BeautifulSoup(r.text, "lxml")
-    events = []
-    for tag in soup.find_all("script", type="application/ld+json"):
-        try:
-            payload = json.loads(tag.string or tag.text or "{}")
-        except Exception:
-            continue
-        items = payload if isinstance(payload, list) else [payload]
-        for item in items:
-            if isinstance(item, dict) and item.get("@type") in ("Event", ["Event"]):
-                events.append({
-                    "name": item.get("name"),
-                    "startDate": item.get("startDate"),
-                    "location": (item.get("location") or {}).get("name") if isinstance(item.get("location"), dict) else item.get("location"),
-                    "offers": item.get("offers"),
-                    "raw": item,
-                })
-    return {"count": len(events), "events": events}
+@router.get("/scrape/seatgeek/bulk")
+async def scrape_seatgeek_bulk(
+    query: str = Query(..., description="Artist, team, or event search query"),
+    per_page: int = Query(100, ge=1, le=100),
+    max_pages: Optional[int] = Query(None, ge=1, le=1000, description="Page cap (default SEATGEEK_BULK_MAX_PAGES)"),
+    concurrency: Optional[int] = Query(None, ge=1, le=32, description="Pages in flight (default SEATGEEK_BULK_CONCURRENCY)"),
+    client_id: Optional[str] = Query(None, description="SeatGeek client_id if required"),
+    persist: bool = Query(False, description="Upsert each page's events into the concerts table"),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
+    """Every page of a SeatGeek search, streamed as NDJSON events as pages arrive.
 
-@router.post("/scrape/urls")
-async def scrape_urls(urls: List[str] = Body(..., embed=True)):
-    out = []
-    async with httpx.AsyncClient(timeout=20) as client:
-        for url in urls:
+    Page 1 gives meta.total; the remaining pages are fetched concurrently. Pages that fail
+    to fetch or persist appear as {"page", "error"} lines and the stream ends with a
+    {"done": true, ...} summary.
+    """
+    params = {"q": query, "per_page": per_page, "page": 1}
+    cid = client_id or settings.seatgeek_client_id
+    if cid:
+        params["client_id"] = cid
+    # Fetched before streaming starts so a bad query or key still gets a proper status code
+    first = await _get_seatgeek(client, params)
+    total = int((first.get("meta") or {}).get("total") or 0)
+    pages = max(1, min(-(-total // per_page), max_pages or settings.seatgeek_bulk_max_pages))
+    limit = asyncio.Semaphore(concurrency or settings.seatgeek_bulk_concurrency)
+
+    async def fetch_page(page: int):
+        async with limit:
             try:
-                r = await client.get(url, headers={"User-Agent": "Mozilla/5.0"})
-                if r.status_code != 200:
-                    out.append({"url": url, "error": f"status {r.status_code}"})
+                return page, await _get_seatgeek(client, {**params, "page": page}), None
+            except HTTPException as e:
+                return page, None, f"status {e.status_code}: {str(e.detail)[:200]}"
+            except Exception as e:
+                return page, None, str(e) or e.__class__.__name__
+
+    async def ndjson():
+        tasks = [asyncio.create_task(fetch_page(page)) for page in range(2, pages + 1)]
+        seen = set()
+        failed = []
+        emitted = persisted = 0
+        async def results():
+            yield 1, first, None
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+
+        try:
+            async for page, data, error in results():
+                if error is not None:
+                    failed.append(page)
+                    yield json.dumps({"page": page, "error": error}) + "\n"
                     continue
-                soup = BeautifulSoup(r.text, "lxml")
-                found = 0
-                for tag in soup.find_all("script", type="application/ld+json"):
+                # Results can shift between pages while we fetch; emit each event once
+                events = []
+                for ev in data.get("events", []):
+                    event_id = ev.get("id")
+                    if event_id is not None:
+                        if event_id in seen:
+                            continue
+                        seen.add(event_id)
+                    events.append(_seatgeek_event(ev))
+                emitted += len(events)
+                yield "".join(json.dumps(ev) + "\n" for ev in events)
+                if persist and events:
                     try:
-                        payload = json.loads(tag.string or tag.text or "{}")
-                    except Exception:
-                        continue
-                    items = payload if isinstance(payload, list) else [payload]
-                    for item in items:
-                        if isinstance(item, dict) and item.get("@type") in ("Event", ["Event"]):
-                            found += 1
-                out.append({"url": url, "events_found": found})
+                        persisted += await _persist_seatgeek(events)
+                    except Exception as e:
+                        # The events were fetched; report the write failure and keep streaming
+                        logger.exception("persisting SeatGeek page %d failed", page)
+                        failed.append(page)
+                        yield json.dumps({"page": page, "error": f"persist failed: {str(e)[:200]}"}) + "\n"
+            summary = {"done": True, "total": total, "pages": pages, "events": emitted, "failed_pages": sorted(failed)}
+            if persist:
+                summary["persisted"] = persisted
+            yield json.dumps(summary) + "\n"
+        finally:
+            # Client went away: don't keep fetching pages nobody reads
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@router.get("/scrape/url")
+async def scrape_url(
+    url: str = Query(..., description="Event page URL to scrape"),
+    persist: bool = Query(False, description="Upsert the events into the concerts table"),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    db: AsyncSession = Depends(get_async_db)
+):
+    key = ("url", normalize_url(url))
+    result = await scrape_flights.do(key, lambda: _fetch_url_events(client, url))
+    if persist:
+        persisted = await upsert_concerts(db, (normalize_jsonld_event(ev["raw"], url) for ev in result["events"]))
+        result = {**result, "persisted": persisted}
+    return result
+
+@router.post("/scrape/urls")
+async def scrape_urls(
+    urls: List[str] = Body(..., embed=True),
+    stream: bool = Query(False, description="Stream per-URL results as NDJSON in completion order"),
+    client: httpx.AsyncClient = Depends(get_http_client)
+):
+    async def results():
+        async for url, r, err in fetch_many(client, urls):
+            if err is not None:
+                yield {"url": url, "error": str(err) or err.__class__.__name__}
+                continue
+            if r.status_code != 200:
+                yield {"url": url, "error": f"status {r.status_code}"}
+                continue
+            try:
+                found = len(await extract_events_async(r.text))
             except Exception as e:
-                out.append({"url": url, "error": str(e)})
-    return {"results": out}
+                yield {"url": url, "error": str(e)}
+                continue
+            yield {"url": url, "events_found": found}
+
+    if stream:
+        async def ndjson():
+            async for result in results():
+                yield json.dumps(result) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+    return {"results": [result async for result in results()]}
 
 @router.get("/scrape/discover")
 async def scrape_discover(
     url: str = Query(..., description="Seed page URL; we will crawl same-domain links to find Event JSON-LD"),
-    max_pages: int = Query(10, ge=1, le=50)
+    max_pages: int = Query(10, ge=1, le=500),
+    max_depth: Optional[int] = Query(None, ge=1, le=5, description="Link depth from the seed (default CRAWL_MAX_DEPTH)"),
+    workers: Optional[int] = Query(None, ge=1, le=32, description="Concurrent crawl workers (default CRAWL_WORKERS)"),
+    persist: bool = Query(False, description="Upsert the events into the concerts table"),
+    client: httpx.AsyncClient = Depends(get_http_client),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    async with httpx.AsyncClient(timeout=20) as client:
-        # fetch seed
-        r = await client.get(url, headers={"User-Agent": "Mozilla/5.0"})
-        if r.status_code != 200:
-            raise HTTPException(status_code=r.status_code, detail=f"Seed fetch failed: {r.text[:200]}")
-        soup = BeautifulSoup(r.text, "lxml")
-        # collect same-origin links
-        origin = urlparse(url).netloc
-        hrefs = []
-        for a in soup.find_all("a", href=True):
-            href = a.get("href")
-            abs_url = urljoin(url, href)
-            if urlparse(abs_url).netloc == origin:
-                hrefs.append(abs_url)
-        # de-dup and cap
-        seen = set()
-        crawl = []
-        for h in hrefs:
-            if h not in seen:
-                seen.add(h)
-                crawl.append(h)
-            if len(crawl) >= max_pages:
-                break
-        # visit and extract events
-        found = []
-        for link in crawl:
-            try:
-                rr = await client.get(link, headers={"User-Agent": "Mozilla/5.0"})
-                if rr.status_code != 200:
-                    continue
-                psoup = BeautifulSoup(rr.text, "lxml")
-                for tag in psoup.find_all("script", type="application/ld+json"):
-                    try:
-                        payload = json.loads(tag.string or tag.text or "{}")
-                    except Exception:
-                        continue
-                    items = payload if isinstance(payload, list) else [payload]
-                    for item in items:
-                        if isinstance(item, dict) and item.get("@type") in ("Event", ["Event"]):
-                            found.append({
-                                "source": link,
-                                "name": item.get("name"),
-                                "startDate": item.get("startDate"),
-                                "location": (item.get("location") or {}).get("name") if isinstance(item.get("location"), dict) else item.get("location"),
-                                "raw": item,
-                            })
-            except Exception:
-                continue
-    return {"seed": url, "scanned": len(crawl), "events": found}
+    # fetch seed
+    try:
+        r = await upstream.get(client, url, headers=DEFAULT_HEADERS)
+    except CircuitOpenError as e:
+        raise _upstream_unavailable(e)
+    if r.status_code != 200:
+        raise HTTPException(status_code=r.status_code, detail=f"Seed fetch failed: {r.text[:200]}")
+    result = await crawl(client, url, r.text, max_pages=max_pages, max_depth=max_depth, workers=workers)
+    found = [
+        {
+            "source": ev["source"],
+            "name": ev["item"].get("name"),
+            "startDate": ev["item"].get("startDate"),
+            "location": _location_name(ev["item"]),
+            "raw": ev["item"],
+        }
+        for ev in result["events"]
+    ]
+    response = {"seed": url, "scanned": len(result["scanned"]), "events": found}
+    if persist:
+        response["persisted"] = await upsert_concerts(
+            db, (normalize_jsonld_event(ev["raw"], ev["source"]) for ev in found)
+        )
+    return response
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss/revalidation counters for the HTTP response cache and the in-process caches"""
+    coalesced = {"in_flight": scrape_flights.in_flight(), "shared": scrape_flights.shared}
+    local = {"insights": insights_cache.summary(), "identity": identity_cache_summary()}
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False, "coalesced": coalesced, **local}
+    return {"enabled": True, **await asyncio.to_thread(cache.summary), "coalesced": coalesced, **local}
+
+@router.get("/upstream/stats")
+async def upstream_stats():
+    """Per-host request/retry/throttle counters, current adaptive rate and circuit state"""
+    return upstream.summary()
+
+_CIRCUIT_STATES = {"closed": 0, "half-open": 1, "open": 2}
+
+@router.get("/metrics")
+async def prometheus_metrics():
+    """Latency histograms and queue/pool/upstream gauges in the Prometheus text format"""
+    telemetry.ingest_queue_pending.set(ingest_queue.pending())
+    telemetry.ingest_queue_capacity.set(ingest_queue.max_pending)
+    for engine_name, pool in pool_stats().items():
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            if state in pool:
+                telemetry.db_pool_connections.set(pool[state], engine_name, state)
+    rates, circuits = {}, {}
+    for host, host_stats in upstream.summary().items():
+        # Unlisted hosts share the "other" series: its slowest rate and worst circuit state
+        label = telemetry.upstream_host_label(host)
+        rates[label] = min(rates.get(label, host_stats["rate"]), host_stats["rate"])
+        circuits[label] = max(circuits.get(label, 0), _CIRCUIT_STATES[host_stats["circuit"]])
+    for label, rate in rates.items():
+        telemetry.upstream_rate.set(rate, label)
+        telemetry.upstream_circuit.set(circuits[label], label)
+    return Response(telemetry.render(), media_type=telemetry.CONTENT_TYPE)
+
+@router.get("/ingest/stats")
+async def ingest_stats():
+    """Write-behind ingest queue depth and counters"""
+    return ingest_queue.summary()
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    """Connection pool counters for the sync and async database engines"""
+    return pool_stats()
 
 # Data pipeline endpoints
 @router.post("/interactions")
 async def create_user_interaction(
+    request: Request,
     user_id: str = Body(..., embed=True),
     artist_name: str = Body(..., embed=True),
     interaction_type: str = Body(..., embed=True),
@@ -174,11 +346,34 @@ async def create_user_interaction(
     value: Optional[float] = Body(None, embed=True),
     concert_id: Optional[int] = Body(None, embed=True),
     metadata: Optional[dict] = Body(None, embed=True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Create a new user interaction"""
-    interaction = create_interaction(
-        db=db,
+    """Create a new user interaction; 202 without an id when write-behind ingest is on"""
+    write_behind = settings.ingest_write_behind or "respond-async" in request.headers.get("prefer", "")
+    if write_behind and ingest_queue.running:
+        timestamp = datetime.utcnow()
+        accepted = ingest_queue.submit({
+            "user_id": user_id,
+            "artist_name": artist_name,
+            "interaction_type": interaction_type,
+            "channel": channel,
+            "value": value,
+            "concert_id": concert_id,
+            "metadata": metadata,
+            "timestamp": timestamp.isoformat()
+        })
+        if not accepted:
+            raise HTTPException(status_code=503, detail="Ingest queue is full", headers={"Retry-After": "1"})
+        return JSONResponse(status_code=202, content={
+            "status": "accepted",
+            "user_id": user_id,
+            "artist_name": artist_name,
+            "interaction_type": interaction_type,
+            "channel": channel,
+            "timestamp": timestamp.isoformat()
+        })
+    interaction = await create_interaction(
+        db,
         user_id=user_id,
         artist_name=artist_name,
         interaction_type=interaction_type,
@@ -188,41 +383,157 @@ async def create_user_interaction(
         metadata=metadata
     )
     return {
-        "id": interaction.id,
+        "id": interaction["id"],
         "user_id": user_id,
         "artist_name": artist_name,
         "interaction_type": interaction_type,
         "channel": channel,
-        "timestamp": interaction.timestamp.isoformat()
+        "timestamp": interaction["timestamp"].isoformat()
+    }
+
+class InteractionEvent(BaseModel):
+    user_id: str
+    artist_name: str
+    interaction_type: str
+    channel: str
+    value: Optional[float] = None
+    concert_id: Optional[int] = None
+    metadata: Optional[dict] = None
+    timestamp: Optional[datetime] = None
+
+def _parse_batch_body(body: bytes, content_type: str) -> list:
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = []
+        for lineno, line in enumerate(body.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid JSON on line {lineno}: {e}")
+        return items
+    try:
+        payload = json.loads(body or b"null")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if isinstance(payload, dict) and isinstance(payload.get("events"), list):
+        payload = payload["events"]
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of interactions or NDJSON")
+    return payload
+
+@router.post("/interactions/batch")
+async def create_user_interactions_batch(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Create many interactions from a JSON array or NDJSON body (application/x-ndjson)"""
+    items = _parse_batch_body(await request.body(), request.headers.get("content-type", ""))
+    if len(items) > settings.interactions_batch_max:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.interactions_batch_max} interactions")
+    events = []
+    for index, item in enumerate(items):
+        try:
+            events.append(InteractionEvent.model_validate(item).model_dump())
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail={"index": index, "errors": e.errors(include_url=False)})
+    inserted = await create_interactions_bulk(db, events)
+    return {"inserted": inserted}
+
+def _cached_json(request: Request, entry: CachedBody) -> Response:
+    """JSON response for a cached read; 304 when the client already has this version"""
+    max_age = settings.insights_max_age
+    headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"public, max-age={max_age}" if max_age > 0 else "no-cache",
     }
+    client_tags = [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]
+    if entry.etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
 
 @router.get("/insights/top-artists")
 async def get_top_artists(
+    request: Request,
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get top artists by attribution score"""
-    artists = get_top_artists_by_attribution(db, limit)
-    return {"top_artists": artists}
+    key = ("top_artists", limit)
+    entry = insights_cache.get(key)
+    if entry is None:
+        generation = insights_cache.generation([TOP_ARTISTS])
+        artists = await get_top_artists_by_attribution(db, limit)
+        entry = insights_cache.put(key, {"top_artists": artists}, [TOP_ARTISTS], generation)
+    return _cached_json(request, entry)
+
+@router.post("/insights/leaderboard/rebuild")
+async def rebuild_artist_leaderboard(db: AsyncSession = Depends(get_async_db)):
+    """Recompute the top-artists leaderboard from the attributions table"""
+    count = await rebuild_leaderboard(db)
+    return {"artists": count}
 
 @router.get("/insights/artist/{artist_name}")
 async def get_artist_insights(
+    request: Request,
     artist_name: str,
     days: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get comprehensive metrics for a specific artist"""
-    metrics = get_artist_metrics(db, artist_name, days)
-    if not metrics:
-        raise HTTPException(status_code=404, detail=f"Artist '{artist_name}' not found")
-    return metrics
+    key = ("artist", artist_name, days)
+    entry = insights_cache.get(key)
+    if entry is None:
+        generation = insights_cache.generation([ARTIST_METRICS])
+        metrics = await get_artist_metrics(db, artist_name, days)
+        if not metrics:
+            raise HTTPException(status_code=404, detail=f"Artist '{artist_name}' not found")
+        entry = insights_cache.put(key, metrics, [ARTIST_METRICS], generation)
+    return _cached_json(request, entry)
 
 @router.post("/metrics/compute")
 async def compute_metrics(
     date: Optional[str] = Body(None, embed=True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Compute daily metrics for all artists"""
     target_date = datetime.fromisoformat(date) if date else datetime.utcnow()
-    compute_daily_metrics_for_date(db, target_date)
+    await compute_daily_metrics_for_date(db, target_date)
     return {"message": f"Metrics computed for {target_date.date()}", "date": target_date.isoformat()}
+
+@router.post("/metrics/backfill")
+async def backfill_metrics(
+    start: Optional[str] = Body(None, embed=True),
+    end: Optional[str] = Body(None, embed=True),
+    incremental: bool = Body(True, embed=True),
+    workers: Optional[int] = Body(None, embed=True, ge=1, le=32)
+):
+    """Recompute daily metrics for a date range; incremental runs skip days without new interactions"""
+    try:
+        start_date = datetime.fromisoformat(start) if start else None
+        end_date = datetime.fromisoformat(end) if end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def log_progress(done: int, total: int, day: datetime):
+        logger.info("metrics backfill %d/%d (%s)", done, total, day.date())
+
+    try:
+        return await asyncio.to_thread(
+            backfill_daily_metrics, start_date, end_date, incremental, workers, log_progress
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export/{dataset}")
+async def export_dataset(
+    dataset: Literal["interactions", "attributions", "daily-metrics"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    start: Optional[date] = Query(None, description="First day (interaction time, last interaction, or metrics date)"),
+    end: Optional[date] = Query(None, description="Last day, inclusive"),
+    artist: Optional[str] = Query(None, description="Only rows for this artist name")
+):
+    """Stream a dataset as NDJSON or CSV without loading it into memory"""
+    stmt = export_statement(dataset, start, end, artist)
+    return StreamingResponse(
+        stream_export(stmt, format),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{format}"'}
+    )
@@ -0,0 +1,236 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Optional
+
+import numpy as np
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from .analytics import encode, score_attributions
+from .crud import compute_daily_metrics_for_date, rebuild_leaderboard, upsert_attributions
+from .db import SessionLocal
+from .models import Interaction, JobWatermark
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+DAILY_METRICS_WATERMARK = "daily_metrics"
+
+def get_watermark(db: Session, name: str) -> int:
+    """Highest interaction id a job has already processed (0 if never run)"""
+    value = db.query(JobWatermark.last_interaction_id).filter(JobWatermark.name == name).scalar()
+    return value or 0
+
+def set_watermark(db: Session, name: str, last_interaction_id: int):
+    watermark = db.query(JobWatermark).filter(JobWatermark.name == name).first()
+    if watermark:
+        watermark.last_interaction_id = last_interaction_id
+        watermark.updated_at = datetime.utcnow()
+    else:
+        db.add(JobWatermark(name=name, last_interaction_id=last_interaction_id))
+    db.commit()
+
+def _as_day(value) -> datetime:
+    # func.date() comes back as a string on SQLite and a date on Postgres
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    return datetime(value.year, value.month, value.day)
+
+def days_to_backfill(
+    db: Session,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    incremental: bool,
+    high_water: int,
+) -> List[datetime]:
+    """Days in [start, end] to recompute; incremental runs keep only days new interactions affect"""
+    if not incremental:
+        if start is None or end is None:
+            raise ValueError("A full backfill needs both start and end dates")
+        first, last = _as_day(start), _as_day(end)
+        return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+    watermark = get_watermark(db, DAILY_METRICS_WATERMARK)
+    # new_users depends on each (user, artist) pair's first interaction, so a back-dated event
+    # changes every later day the pair is active on, not just its own day
+    new_pairs = db.query(
+        Interaction.user_id,
+        Interaction.artist_id,
+        func.min(Interaction.timestamp).label("since")
+    ).filter(
+        Interaction.id > watermark,
+        Interaction.id <= high_water
+    ).group_by(Interaction.user_id, Interaction.artist_id).subquery()
+    query = db.query(func.date(Interaction.timestamp)).join(new_pairs, and_(
+        Interaction.user_id == new_pairs.c.user_id,
+        Interaction.artist_id == new_pairs.c.artist_id
+    )).filter(
+        Interaction.timestamp >= new_pairs.c.since,
+        Interaction.id <= high_water
+    )
+    if start is not None:
+        query = query.filter(Interaction.timestamp >= _as_day(start))
+    if end is not None:
+        query = query.filter(Interaction.timestamp < _as_day(end) + timedelta(days=1))
+    return sorted(_as_day(d) for (d,) in query.distinct().all() if d is not None)
+
+def _compute_day(day: datetime) -> datetime:
+    # Each worker thread gets its own session; sessions are not thread-safe
+    db = SessionLocal()
+    try:
+        compute_daily_metrics_for_date(db, day)
+    finally:
+        db.close()
+    return day
+
+def _compute_days(days: List[datetime], workers: Optional[int], progress) -> tuple:
+    computed, failed = [], []
+    with ThreadPoolExecutor(max_workers=workers or settings.backfill_workers) as pool:
+        futures = {pool.submit(_compute_day, day): day for day in days}
+        for done, future in enumerate(as_completed(futures), 1):
+            day = futures[future]
+            try:
+                future.result()
+                computed.append(day)
+            except Exception as e:
+                logger.exception("Daily metrics failed for %s", day.date())
+                failed.append({"date": day.date().isoformat(), "error": str(e)})
+            if progress:
+                progress(done, len(days), day)
+    return computed, failed
+
+def _compute_days_from_snapshot(days: List[datetime], progress) -> tuple:
+    # pyarrow is only needed for this mode
+    from .snapshot import compute_daily_metrics_from_snapshot, snapshot_interactions
+    try:
+        snapshot_interactions()
+        compute_daily_metrics_from_snapshot(days, progress=progress)
+    except Exception as e:
+        logger.exception("Daily metrics from snapshot failed")
+        return [], [{"date": day.date().isoformat(), "error": str(e)} for day in days]
+    return list(days), []
+
+def backfill_daily_metrics(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    incremental: bool = True,
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int, datetime], None]] = None,
+    from_snapshot: bool = False,
+) -> dict:
+    """Recompute ArtistDailyMetrics for a date range across a pool of workers.
+
+    The watermark only advances after an incremental run over all dates (no start/end)
+    succeeds, so a range-limited run never hides new interactions on other days.
+    With from_snapshot, the Parquet snapshot is brought up to date and every day is
+    computed from it in one vectorized pass instead of per-day SQL.
+    """
+    db = SessionLocal()
+    try:
+        high_water = db.query(func.max(Interaction.id)).scalar() or 0
+        days = days_to_backfill(db, start, end, incremental, high_water)
+    finally:
+        db.close()
+
+    if from_snapshot and days:
+        computed, failed = _compute_days_from_snapshot(days, progress)
+    else:
+        computed, failed = _compute_days(days, workers, progress)
+
+    watermark_advanced = incremental and start is None and end is None and not failed
+    if watermark_advanced:
+        db = SessionLocal()
+        try:
+            set_watermark(db, DAILY_METRICS_WATERMARK, high_water)
+        finally:
+            db.close()
+
+    return {
+        "days": len(days),
+        "computed": sorted(d.date().isoformat() for d in computed),
+        "failed": failed,
+        "watermark": high_water if watermark_advanced else None,
+    }
+
+def _user_chunks(db: Session, chunk_rows: int):
+    # Consecutive user_id ranges holding about chunk_rows interactions each; a user is never split
+    counts = db.query(Interaction.user_id, func.count()).group_by(Interaction.user_id).order_by(Interaction.user_id)
+    first, size = None, 0
+    for user_id, count in counts:
+        if first is None:
+            first = user_id
+        size += count
+        if size >= chunk_rows:
+            yield first, user_id
+            first, size = None, 0
+    if first is not None:
+        yield first, user_id
+
+def _attribution_rows(scores: dict) -> List[dict]:
+    return [
+        {
+            "user_id": user_id,
+            "artist_id": artist_id,
+            "score": score,
+            "interaction_count": count,
+            "total_value": total_value,
+            "last_interaction": last_interaction,
+        }
+        for user_id, artist_id, score, count, total_value, last_interaction in zip(
+            scores["user_id"].tolist(), scores["artist_id"].tolist(), scores["score"].tolist(),
+            scores["interaction_count"].tolist(), scores["total_value"].tolist(),
+            scores["last_interaction"].tolist()
+        )
+    ]
+
+def recompute_attributions_bulk(
+    chunk_rows: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    from_snapshot: bool = False,
+) -> int:
+    """Re-score every (user, artist) pair with NumPy and bulk-upsert the results.
+
+    Interactions are loaded a range of users at a time (or all at once from the Parquet
+    snapshot), scored with grouped array operations and written back with one ON CONFLICT
+    upsert per chunk. The leaderboard is rebuilt at the end. Returns the number of pairs.
+    """
+    db = SessionLocal()
+    try:
+        if from_snapshot:
+            # pyarrow is only needed for this mode
+            from .snapshot import attributions_from_snapshot, snapshot_interactions
+            snapshot_interactions()
+            rows = _attribution_rows(attributions_from_snapshot())
+            upsert_attributions(db, rows)
+            db.commit()
+            pairs = len(rows)
+        else:
+            chunks = list(_user_chunks(db, chunk_rows or settings.attribution_chunk_rows))
+            pairs = 0
+            for done, (first, last) in enumerate(chunks, 1):
+                columns = db.query(
+                    Interaction.id, Interaction.user_id, Interaction.artist_id,
+                    Interaction.interaction_type, Interaction.timestamp, Interaction.value
+                ).filter(Interaction.user_id.between(first, last)).all()
+                ids, user_ids, artist_ids, types, timestamps, values = zip(*columns)
+                type_code, type_names = encode(types)
+                scores = score_attributions(
+                    np.array(ids, dtype=np.int64),
+                    np.array(user_ids, dtype=np.int64),
+                    np.array(artist_ids, dtype=np.int64),
+                    np.array(timestamps, dtype="datetime64[us]"),
+                    type_code,
+                    type_names,
+                    np.array(values, dtype=np.float64),
+                )
+                rows = _attribution_rows(scores)
+                upsert_attributions(db, rows)
+                db.commit()
+                pairs += len(rows)
+                if progress:
+                    progress(done, len(chunks))
+        rebuild_leaderboard(db)
+    finally:
+        db.close()
+    return pairs
@@ -0,0 +1,120 @@
+"""Maintenance commands: python -m app.cli <command> --help"""
+import argparse
+import sys
+from datetime import datetime
+
+from .backfill import backfill_daily_metrics, recompute_attributions_bulk
+from .db import Base, SessionLocal, engine, ensure_indexes
+from .index_advisor import check_query_plans
+from .crud import rebuild_leaderboard, recompute_all_attributions, recompute_attribution_for_user
+from .models import User
+
+def _progress(done: int, total: int):
+    if done == total or done % 100 == 0:
+        print(f"  {done}/{total}", file=sys.stderr)
+
+def cmd_recompute_attribution(args):
+    if args.bulk or args.from_snapshot:
+        if args.user_id:
+            sys.exit("--bulk and --from-snapshot re-score every user; drop --user-id")
+        count = recompute_attributions_bulk(progress=_progress, from_snapshot=args.from_snapshot)
+        print(f"Recomputed attribution for {count} user/artist pairs")
+        return
+    db = SessionLocal()
+    try:
+        if args.user_id:
+            user = db.query(User).filter(User.user_id == args.user_id).first()
+            if not user:
+                sys.exit(f"User '{args.user_id}' not found")
+            recompute_attribution_for_user(db, user.id)
+            print(f"Recomputed attribution for user {args.user_id}")
+        else:
+            count = recompute_all_attributions(db, progress=_progress)
+            print(f"Recomputed attribution for {count} users")
+    finally:
+        db.close()
+
+def cmd_rebuild_leaderboard(args):
+    db = SessionLocal()
+    try:
+        count = rebuild_leaderboard(db)
+        print(f"Rebuilt leaderboard for {count} artists")
+    finally:
+        db.close()
+
+def cmd_backfill_metrics(args):
+    def report(done, total, day):
+        print(f"  [{done}/{total}] {day.date()}", file=sys.stderr)
+
+    try:
+        result = backfill_daily_metrics(
+            start=args.start, end=args.end, incremental=not args.full,
+            workers=args.workers, progress=report, from_snapshot=args.from_snapshot
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Computed {len(result['computed'])} of {result['days']} days")
+    for failure in result["failed"]:
+        print(f"  failed {failure['date']}: {failure['error']}", file=sys.stderr)
+    if result["watermark"] is not None:
+        print(f"Watermark advanced to interaction id {result['watermark']}")
+    if result["failed"]:
+        sys.exit(1)
+
+def cmd_snapshot_interactions(args):
+    # pyarrow is only needed for this command
+    from .snapshot import snapshot_interactions
+    result = snapshot_interactions(root=args.dir)
+    print(f"Wrote {result['rows']} interactions; snapshot covers up to interaction id {result['watermark']}")
+
+def cmd_check_indexes(args):
+    flagged = 0
+    for entry in check_query_plans(engine):
+        status = "FULL SCAN of " + ", ".join(entry["full_scans"]) if entry["full_scans"] else "ok"
+        print(f"{entry['query']}: {status}")
+        if entry["full_scans"] or args.verbose:
+            for line in entry["plan"]:
+                print(f"    {line}")
+        flagged += bool(entry["full_scans"])
+    print(f"{flagged} queries with full table scans")
+    if flagged and args.strict:
+        sys.exit(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("recompute-attribution", help="Rebuild attribution scores from the full interaction history")
+    p.add_argument("--user-id", help="Only this external user_id (default: every user)")
+    p.add_argument("--bulk", action="store_true", help="Score all users with NumPy in chunks and bulk-upsert (much faster for a full re-score)")
+    p.add_argument("--from-snapshot", action="store_true", help="Like --bulk, but read interactions from the refreshed Parquet snapshot")
+    p.set_defaults(func=cmd_recompute_attribution)
+
+    p = commands.add_parser("rebuild-leaderboard", help="Recompute the artist leaderboard from stored attributions")
+    p.set_defaults(func=cmd_rebuild_leaderboard)
+
+    p = commands.add_parser("backfill-metrics", help="Recompute daily artist metrics for a date range")
+    p.add_argument("--start", type=datetime.fromisoformat, help="First day (YYYY-MM-DD)")
+    p.add_argument("--end", type=datetime.fromisoformat, help="Last day, inclusive (YYYY-MM-DD)")
+    p.add_argument("--full", action="store_true", help="Recompute every day in the range, not just days with new interactions")
+    p.add_argument("--workers", type=int, help="Parallel workers (default BACKFILL_WORKERS)")
+    p.add_argument("--from-snapshot", action="store_true", help="Refresh the Parquet snapshot and compute every day from it in one vectorized pass")
+    p.set_defaults(func=cmd_backfill_metrics)
+
+    p = commands.add_parser("snapshot-interactions", help="Append new interactions to the day-partitioned Parquet snapshot")
+    p.add_argument("--dir", help="Snapshot directory (default SNAPSHOT_DIR)")
+    p.set_defaults(func=cmd_snapshot_interactions)
+
+    p = commands.add_parser("check-indexes", help="EXPLAIN the hot queries and flag full table scans")
+    p.add_argument("--verbose", action="store_true", help="Print every query plan, not just flagged ones")
+    p.add_argument("--strict", action="store_true", help="Exit non-zero if any query full-scans a table")
+    p.set_defaults(func=cmd_check_indexes)
+
+    args = parser.parse_args(argv)
+    # Commands may run against a database the API server has never started on
+    Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+from posixpath import splitext
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from .extract import extract_page_async
+from .fetch import DEFAULT_HEADERS, normalize_url
+from .ratelimit import HostRateLimiter, upstream
+from .settings import settings
+
+# Path fragments that usually mark an event/listing page; these links are crawled first
+EVENT_HINTS = (
+    "event", "concert", "show", "ticket", "tour", "gig", "performance",
+    "calendar", "schedule", "lineup", "festival", "whats-on", "whatson",
+)
+
+# Obvious non-HTML resources that are never worth a fetch
+SKIP_EXTENSIONS = frozenset({
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css", ".js",
+    ".pdf", ".zip", ".mp3", ".mp4", ".mov", ".woff", ".woff2", ".ttf", ".xml", ".json",
+})
+
+def looks_like_event_page(url: str) -> bool:
+    path = urlparse(url).path.lower()
+    return any(hint in path for hint in EVENT_HINTS)
+
+def _crawlable(url: str) -> bool:
+    parts = urlparse(url)
+    return parts.scheme in ("http", "https") and splitext(parts.path)[1].lower() not in SKIP_EXTENSIONS
+
+async def crawl(
+    client: httpx.AsyncClient,
+    seed: str,
+    seed_html: str,
+    max_pages: int,
+    max_depth: Optional[int] = None,
+    workers: Optional[int] = None,
+    rate_per_host: Optional[float] = None,
+) -> dict:
+    """Best-first BFS crawl from an already-fetched seed page, collecting Event JSON-LD"""
+    max_depth = settings.crawl_max_depth if max_depth is None else max_depth
+    workers = workers or settings.crawl_workers
+    limiter = HostRateLimiter(rate_per_host or settings.crawl_rate_per_host, burst=settings.crawl_burst_per_host)
+
+    # Frontier entries sort by (not event-like, depth, discovery order)
+    frontier: asyncio.PriorityQueue = asyncio.PriorityQueue()
+    order = itertools.count()
+    seen = {normalize_url(seed)}
+    scanned: List[str] = []
+    events: List[dict] = []
+
+    def enqueue(links: List[str], depth: int):
+        if depth > max_depth:
+            return
+        for link in links:
+            key = normalize_url(link)
+            if key in seen or not _crawlable(link):
+                continue
+            seen.add(key)
+            frontier.put_nowait((not looks_like_event_page(link), depth, next(order), link))
+
+    def record(source: str, found: List[dict]):
+        for item in found:
+            events.append({"source": source, "item": item})
+
+    seed_events, seed_links = await extract_page_async(seed_html, seed)
+    record(seed, seed_events)
+    enqueue(seed_links, 1)
+
+    async def worker():
+        while True:
+            _, depth, _, link = await frontier.get()
+            try:
+                # Budget is claimed before fetching so concurrent workers can't overshoot it
+                if len(scanned) >= max_pages:
+                    continue
+                scanned.append(link)
+                await limiter.acquire(urlparse(link).netloc)
+                try:
+                    r = await upstream.get(client, link, headers=DEFAULT_HEADERS)
+                except Exception:
+                    continue
+                if r.status_code != 200 or "html" not in r.headers.get("content-type", "text/html"):
+                    continue
+                try:
+                    found, links = await extract_page_async(r.text, link)
+                except Exception:
+                    continue
+                record(link, found)
+                enqueue(links, depth + 1)
+            finally:
+                frontier.task_done()
+
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    try:
+        await frontier.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return {"scanned": scanned, "events": events}
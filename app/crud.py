@@ -1,28 +1,85 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from datetime import datetime, timedelta
-from typing import List, Optional
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import and_, case, delete, desc, distinct, func, insert, literal, tuple_, update
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
 import json
-from .models import Artist, User, Concert, Interaction, Attribution, ArtistDailyMetrics
+from .db import dialect_insert
+from . import identity_cache
+from .insights_cache import ARTIST_METRICS, TOP_ARTISTS, invalidate_on_commit
+from .models import Artist, User, Concert, Interaction, Attribution, ArtistDailyMetrics, ArtistLeaderboard
+
+def _chunks(items: list, size: int = 500):
+    # Keeps IN (...) lists under SQLite's bound-parameter limit
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 def get_or_create_artist(db: Session, name: str, genre: str = None) -> Artist:
     """Get or create an artist by name"""
+    cached = identity_cache.artist_ids.get_many([name]).get(name)
+    if cached is not None:
+        return db.get(Artist, cached)
     artist = db.query(Artist).filter(Artist.name == name).first()
     if not artist:
         artist = Artist(name=name, genre=genre)
         db.add(artist)
-        db.commit()
-        db.refresh(artist)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request created it first
+            db.rollback()
+            artist = db.query(Artist).filter(Artist.name == name).one()
+        else:
+            db.refresh(artist)
+    identity_cache.artist_ids.put_many({name: artist.id})
     return artist
 
+def _resolve_ids(db: Session, model, key_column, keys, cache) -> Dict[str, int]:
+    keys = {k for k in keys if k is not None}
+    if not keys:
+        return {}
+    ids = cache.get_many(keys)
+    for chunk in _chunks(sorted(k for k in keys if k not in ids)):
+        ids.update(db.query(key_column, model.id).filter(key_column.in_(chunk)).all())
+    missing = sorted(k for k in keys if k not in ids)
+    if missing:
+        # Insert-or-ignore tolerates a concurrent writer creating the same row first
+        upsert_insert = dialect_insert(db.get_bind())
+        db.execute(upsert_insert(model).on_conflict_do_nothing(index_elements=[key_column]),
+                   [{key_column.key: k, "created_at": datetime.utcnow()} for k in missing])
+        db.commit()
+        for chunk in _chunks(missing):
+            ids.update(db.query(key_column, model.id).filter(key_column.in_(chunk)).all())
+    # Only committed rows get here, so a rollback can't leave a dangling id in the cache
+    cache.put_many(ids)
+    return ids
+
+def resolve_artist_ids(db: Session, names) -> Dict[str, int]:
+    """Map artist names to ids, creating missing artists in one statement"""
+    return _resolve_ids(db, Artist, Artist.name, names, identity_cache.artist_ids)
+
+def resolve_user_ids(db: Session, user_ids) -> Dict[str, int]:
+    """Map external user_ids to primary keys, creating missing users in one statement"""
+    return _resolve_ids(db, User, User.user_id, user_ids, identity_cache.user_ids)
+
 def get_or_create_user(db: Session, user_id: str, email: str = None) -> User:
     """Get or create a user by user_id"""
+    cached = identity_cache.user_ids.get_many([user_id]).get(user_id)
+    if cached is not None:
+        return db.get(User, cached)
     user = db.query(User).filter(User.user_id == user_id).first()
     if not user:
         user = User(user_id=user_id, email=email)
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request created it first
+            db.rollback()
+            user = db.query(User).filter(User.user_id == user_id).one()
+        else:
+            db.refresh(user)
+    identity_cache.user_ids.put_many({user_id: user.id})
     return user
 
 def create_interaction(
@@ -36,14 +93,14 @@ def create_interaction(
     metadata: dict = None
 ) -> Interaction:
     """Create a new interaction record"""
-    # Get or create user and artist
-    user = get_or_create_user(db, user_id)
-    artist = get_or_create_artist(db, artist_name)
+    # Resolve (or create) user and artist ids; usually an in-memory hit
+    user_pk = resolve_user_ids(db, [user_id])[user_id]
+    artist_pk = resolve_artist_ids(db, [artist_name])[artist_name]
     
     # Create interaction
     interaction = Interaction(
-        user_id=user.id,
-        artist_id=artist.id,
+        user_id=user_pk,
+        artist_id=artist_pk,
         concert_id=concert_id,
         interaction_type=interaction_type,
         channel=channel,
@@ -55,11 +112,303 @@ def create_interaction(
     db.commit()
     db.refresh(interaction)
     
-    # Update attribution
-    recompute_attribution_for_user(db, user.id)
+    # Update attribution for this (user, artist) pair only
+    update_attribution_for_interaction(db, interaction)
     
     return interaction
 
+def _naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    # Stored timestamps are naive UTC (datetime.utcnow()); an offset would otherwise be
+    # dropped as-is, filing e.g. 23:30-05:00 under the wrong day
+    if ts is not None and ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+def create_interactions_bulk(db: Session, events: List[dict]) -> int:
+    """Insert many interactions at once and rescore each affected (user, artist) pair"""
+    if not events:
+        return 0
+    users = resolve_user_ids(db, (e["user_id"] for e in events))
+    artists = resolve_artist_ids(db, (e["artist_name"] for e in events))
+    
+    now = datetime.utcnow()
+    rows = [
+        {
+            "user_id": users[e["user_id"]],
+            "artist_id": artists[e["artist_name"]],
+            "concert_id": e.get("concert_id"),
+            "interaction_type": e["interaction_type"],
+            "channel": e["channel"],
+            "timestamp": _naive_utc(e.get("timestamp")) or now,
+            "value": e.get("value"),
+            "metadata_json": json.dumps(e["metadata"]) if e.get("metadata") else None,
+        }
+        for e in events
+    ]
+    pairs = list({(row["user_id"], row["artist_id"]) for row in rows})
+    # Rows and their scores commit together: a failed call stores nothing, so callers
+    # (the write-behind queue) can retry it without duplicating interactions
+    for attempt in range(2):
+        try:
+            # A list of parameter sets runs as one executemany
+            db.execute(insert(Interaction), rows)
+            _bump_leaderboard(db, _rescore_pairs(db, pairs))
+            db.commit()
+            return len(rows)
+        except IntegrityError:
+            # A concurrent request created one of the attribution rows first; redo as updates
+            db.rollback()
+            if attempt:
+                raise
+        except Exception:
+            db.rollback()
+            raise
+
+# Interaction type weights
+TYPE_WEIGHTS = {
+    'view': 0.1,
+    'click': 0.3,
+    'purchase': 1.0,
+    'stream': 0.5,
+    'social': 0.2
+}
+DEFAULT_TYPE_WEIGHT = 0.1
+MAX_TYPE_WEIGHT_SUM = sum(TYPE_WEIGHTS.values())
+
+def _recency_weight(position: int) -> float:
+    # Weight of the interaction at this position in timestamp order
+    return 1.0 / (1.0 + position * 0.1)
+
+def _normalize_score(raw_score: float, interaction_count: int) -> float:
+    # Normalize score to 0-1 range
+    max_possible_score = MAX_TYPE_WEIGHT_SUM * interaction_count
+    return min(raw_score / max_possible_score, 1.0) if max_possible_score > 0 else 0.0
+
+def _write_attribution(db: Session, user_id: int, artist_id: int, artist_ints: List[Interaction],
+                       existing: Optional[Dict[tuple, Attribution]] = None) -> tuple:
+    """Score one (user, artist) pair from its interactions and store it (no commit).
+    
+    `existing` holds pre-loaded attribution rows by (user_id, artist_id); without it the
+    pair's row is looked up. Returns the (score, user count, value) change for the artist's
+    leaderboard row.
+    """
+    # Sort by timestamp
+    artist_ints.sort(key=lambda x: x.timestamp)
+    
+    # Multi-touch attribution with recency decay
+    score = 0.0
+    total_value = 0.0
+    for i, interaction in enumerate(artist_ints):
+        type_weight = TYPE_WEIGHTS.get(interaction.interaction_type, DEFAULT_TYPE_WEIGHT)
+        score += _recency_weight(i) * type_weight
+        if interaction.value:
+            total_value += interaction.value
+    normalized_score = _normalize_score(score, len(artist_ints))
+    
+    # Update or create attribution record
+    if existing is not None:
+        attribution = existing.get((user_id, artist_id))
+    else:
+        attribution = db.query(Attribution).filter(
+            Attribution.user_id == user_id,
+            Attribution.artist_id == artist_id
+        ).first()
+    
+    if attribution:
+        delta = (normalized_score - attribution.score, 0, total_value - (attribution.total_value or 0.0))
+        attribution.score = normalized_score
+        attribution.last_interaction = artist_ints[-1].timestamp
+        attribution.interaction_count = len(artist_ints)
+        attribution.total_value = total_value
+        attribution.updated_at = datetime.utcnow()
+    else:
+        attribution = Attribution(
+            user_id=user_id,
+            artist_id=artist_id,
+            score=normalized_score,
+            last_interaction=artist_ints[-1].timestamp,
+            interaction_count=len(artist_ints),
+            total_value=total_value
+        )
+        db.add(attribution)
+        delta = (normalized_score, 1, total_value)
+    return delta
+
+def _bump_leaderboard(db: Session, deltas: Dict[int, tuple]):
+    """Add per-artist (score, user count, value) deltas to the leaderboard (no commit)"""
+    now = datetime.utcnow()
+    rows = [
+        {
+            "artist_id": artist_id,
+            "score_sum": score,
+            "user_count": users,
+            "total_value": value,
+            "avg_score": score / users if users else 0.0,
+            "updated_at": now,
+        }
+        for artist_id, (score, users, value) in deltas.items()
+        if score or users or value
+    ]
+    if not rows:
+        return
+    board = ArtistLeaderboard
+    stmt = dialect_insert(db.get_bind())(board)
+    # Increment in SQL so concurrent writers to the same artist don't overwrite each other
+    score_sum = board.score_sum + stmt.excluded.score_sum
+    user_count = board.user_count + stmt.excluded.user_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[board.artist_id],
+        set_={
+            "score_sum": score_sum,
+            "user_count": user_count,
+            "total_value": board.total_value + stmt.excluded.total_value,
+            "avg_score": case((user_count > 0, score_sum / user_count), else_=0.0),
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    for chunk in _chunks(rows):
+        db.execute(stmt, chunk)
+    invalidate_on_commit(db, TOP_ARTISTS)
+
+def rebuild_leaderboard(db: Session, artist_ids: Optional[List[int]] = None) -> int:
+    """Recompute leaderboard rows from the attributions table; returns rows written"""
+    totals = db.query(
+        Attribution.artist_id,
+        func.sum(Attribution.score),
+        func.count(Attribution.id),
+        func.coalesce(func.sum(Attribution.total_value), 0.0),
+        func.avg(Attribution.score),
+        literal(datetime.utcnow())
+    ).group_by(Attribution.artist_id)
+    clear = delete(ArtistLeaderboard)
+    if artist_ids is not None:
+        totals = totals.filter(Attribution.artist_id.in_(artist_ids))
+        clear = clear.where(ArtistLeaderboard.artist_id.in_(artist_ids))
+    db.execute(clear)
+    result = db.execute(insert(ArtistLeaderboard).from_select(
+        ["artist_id", "score_sum", "user_count", "total_value", "avg_score", "updated_at"],
+        totals.statement
+    ))
+    invalidate_on_commit(db, TOP_ARTISTS)
+    db.commit()
+    return result.rowcount
+
+_ATTRIBUTION_COLUMNS = ('score', 'last_interaction', 'interaction_count', 'total_value', 'updated_at')
+
+def upsert_attributions(db: Session, rows: List[dict]):
+    """Bulk-store attribution rows on (user_id, artist_id); leaves the leaderboard alone (no commit)"""
+    if not rows:
+        return
+    now = datetime.utcnow()
+    for row in rows:
+        row.setdefault('updated_at', now)
+        row.setdefault('created_at', now)
+    stmt = dialect_insert(db.get_bind())(Attribution)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Attribution.user_id, Attribution.artist_id],
+        set_={col: stmt.excluded[col] for col in _ATTRIBUTION_COLUMNS}
+    )
+    for chunk in _chunks(rows):
+        db.execute(stmt, chunk)
+
+def seed_leaderboard(db: Session) -> bool:
+    """Build the leaderboard once for a database whose attributions predate it"""
+    if db.query(ArtistLeaderboard.artist_id).first() is not None:
+        return False
+    if db.query(Attribution.id).first() is None:
+        return False
+    rebuild_leaderboard(db)
+    return True
+
+def update_attribution_for_interaction(db: Session, interaction: Interaction):
+    """Fold one new interaction into its (user, artist) attribution in O(1)"""
+    # The stored score is raw / (MAX_TYPE_WEIGHT_SUM * n) and never hits the 1.0 cap
+    # (each type weight is below the sum), so the running raw score is recoverable.
+    # Doing the read-modify-write in one UPDATE keeps concurrent writers from losing increments.
+    n = Attribution.interaction_count
+    type_weight = TYPE_WEIGHTS.get(interaction.interaction_type, DEFAULT_TYPE_WEIGHT)
+    stmt = (
+        update(Attribution)
+        .where(
+            Attribution.user_id == interaction.user_id,
+            Attribution.artist_id == interaction.artist_id,
+            Attribution.interaction_count > 0,
+            Attribution.last_interaction <= interaction.timestamp
+        )
+        .values(
+            # same as _recency_weight(n) * type_weight, folded into the normalized score
+            score=(Attribution.score * MAX_TYPE_WEIGHT_SUM * n + type_weight / (1.0 + n * 0.1))
+                  / (MAX_TYPE_WEIGHT_SUM * (n + 1)),
+            interaction_count=n + 1,
+            total_value=func.coalesce(Attribution.total_value, 0.0) + (interaction.value or 0.0),
+            last_interaction=interaction.timestamp,
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    
+    if not db.get_bind().dialect.update_returning:
+        if db.execute(stmt).rowcount:
+            rebuild_leaderboard(db, [interaction.artist_id])
+            return
+        row = None
+    else:
+        row = db.execute(stmt.returning(Attribution.score, Attribution.interaction_count)).first()
+    
+    # No running state yet, or a back-dated event that changes everyone's position:
+    # rebuild just this pair from its history
+    if row is None:
+        recompute_attribution_for_pair(db, interaction.user_id, interaction.artist_id)
+        return
+    # new = (old * MAX * n + added) / (MAX * (n + 1)), so new - old = (added - new * MAX) / (MAX * n)
+    new_score, count = row
+    n = count - 1
+    added = type_weight / (1.0 + n * 0.1)
+    _bump_leaderboard(db, {interaction.artist_id: (
+        (added - new_score * MAX_TYPE_WEIGHT_SUM) / (MAX_TYPE_WEIGHT_SUM * n), 0, interaction.value or 0.0
+    )})
+    db.commit()
+
+def recompute_attribution_for_pair(db: Session, user_id: int, artist_id: int):
+    """Recompute attribution for one (user, artist) pair from its full history"""
+    for attempt in range(2):
+        artist_ints = db.query(Interaction).filter(
+            Interaction.user_id == user_id,
+            Interaction.artist_id == artist_id
+        ).all()
+        if artist_ints:
+            delta = _write_attribution(db, user_id, artist_id, artist_ints)
+            _bump_leaderboard(db, {artist_id: delta})
+        try:
+            db.commit()
+            return
+        except IntegrityError:
+            # A concurrent request inserted this pair's row first; retry as an update
+            db.rollback()
+            if attempt:
+                raise
+
+def _rescore_pairs(db: Session, pairs: List[tuple]) -> Dict[int, tuple]:
+    """Rescore (user_id, artist_id) pairs from their histories (no commit); returns leaderboard deltas"""
+    interactions: Dict[tuple, List[Interaction]] = {}
+    existing: Dict[tuple, Attribution] = {}
+    for chunk in _chunks(pairs, 250):
+        for interaction in db.query(Interaction).filter(
+            tuple_(Interaction.user_id, Interaction.artist_id).in_(chunk)
+        ):
+            interactions.setdefault((interaction.user_id, interaction.artist_id), []).append(interaction)
+        for attribution in db.query(Attribution).filter(
+            tuple_(Attribution.user_id, Attribution.artist_id).in_(chunk)
+        ):
+            existing[(attribution.user_id, attribution.artist_id)] = attribution
+    deltas: Dict[int, list] = {}
+    for (user_id, artist_id), artist_ints in interactions.items():
+        delta = _write_attribution(db, user_id, artist_id, artist_ints, existing)
+        total = deltas.setdefault(artist_id, [0.0, 0, 0.0])
+        for i, part in enumerate(delta):
+            total[i] += part
+    return {artist_id: tuple(total) for artist_id, total in deltas.items()}
+
 def recompute_attribution_for_user(db: Session, user_id: int):
     """Recompute attribution scores for a user using multi-touch attribution"""
     # Get all interactions for this user
@@ -68,166 +417,146 @@ def recompute_attribution_for_user(db: Session, user_id: int):
     # Group by artist
     artist_interactions = {}
     for interaction in interactions:
-        artist_id = interaction.artist_id
-        if artist_id not in artist_interactions:
-            artist_interactions[artist_id] = []
-        artist_interactions[artist_id].append(interaction)
+        artist_interactions.setdefault(interaction.artist_id, []).append(interaction)
     
     # Calculate attribution scores for each artist
-    for artist_id, artist_ints in artist_interactions.items():
-        # Multi-touch attribution with recency decay
-        score = 0.0
-        total_value = 0.0
-        interaction_count = len(artist_ints)
-        
-        # Sort by timestamp
-        artist_ints.sort(key=lambda x: x.timestamp)
-        
-        for i, interaction in enumerate(artist_ints):
-            # Recency decay: more recent interactions get higher weight
-            recency_weight = 1.0 / (1.0 + i * 0.1)
-            
-            # Interaction type weights
-            type_weights = {
-                'view': 0.1,
-                'click': 0.3,
-                'purchase': 1.0,
-                'stream': 0.5,
-                'social': 0.2
-            }
-            
-            type_weight = type_weights.get(interaction.interaction_type, 0.1)
-            score += recency_weight * type_weight
-            
-            if interaction.value:
-                total_value += interaction.value
-        
-        # Normalize score to 0-1 range
-        max_possible_score = sum(type_weights.values()) * len(artist_ints)
-        normalized_score = min(score / max_possible_score, 1.0) if max_possible_score > 0 else 0.0
-        
-        # Update or create attribution record
-        attribution = db.query(Attribution).filter(
-            Attribution.user_id == user_id,
-            Attribution.artist_id == artist_id
-        ).first()
-        
-        if attribution:
-            attribution.score = normalized_score
-            attribution.last_interaction = artist_ints[-1].timestamp
-            attribution.interaction_count = interaction_count
-            attribution.total_value = total_value
-            attribution.updated_at = datetime.utcnow()
-        else:
-            attribution = Attribution(
-                user_id=user_id,
-                artist_id=artist_id,
-                score=normalized_score,
-                last_interaction=artist_ints[-1].timestamp,
-                interaction_count=interaction_count,
-                total_value=total_value
-            )
-            db.add(attribution)
+    deltas = {
+        artist_id: _write_attribution(db, user_id, artist_id, artist_ints)
+        for artist_id, artist_ints in artist_interactions.items()
+    }
+    _bump_leaderboard(db, deltas)
     
     db.commit()
 
+def recompute_all_attributions(db: Session, progress=None) -> int:
+    """Full backfill: recompute attribution for every user with interactions"""
+    user_ids = [row[0] for row in db.query(Interaction.user_id).distinct().all()]
+    for done, user_id in enumerate(user_ids, 1):
+        recompute_attribution_for_user(db, user_id)
+        if progress:
+            progress(done, len(user_ids))
+    # Start the running sums over from exact totals
+    rebuild_leaderboard(db)
+    return len(user_ids)
+
+_DAILY_METRIC_COLUMNS = (
+    'total_views', 'total_clicks', 'total_purchases', 'total_streams',
+    'total_social_engagements', 'ctr', 'conversion_rate', 'stream_lift',
+    'total_revenue', 'avg_order_value', 'unique_users', 'new_users'
+)
+
+def _count_type(interaction_type: str):
+    return func.sum(case((Interaction.interaction_type == interaction_type, 1), else_=0))
+
 def compute_daily_metrics_for_date(db: Session, date: datetime):
     """Compute daily metrics for all artists for a given date"""
     start_date = date.replace(hour=0, minute=0, second=0, microsecond=0)
     end_date = start_date + timedelta(days=1)
+    on_day = and_(Interaction.timestamp >= start_date, Interaction.timestamp < end_date)
     
-    # Get all artists
-    artists = db.query(Artist).all()
+    # Per-artist counts, revenue and distinct users in one grouped pass over the day
+    totals = db.query(
+        Interaction.artist_id,
+        _count_type('view').label('views'),
+        _count_type('click').label('clicks'),
+        _count_type('purchase').label('purchases'),
+        _count_type('stream').label('streams'),
+        _count_type('social').label('social'),
+        func.sum(case(
+            (Interaction.interaction_type == 'purchase', func.coalesce(Interaction.value, 0.0)),
+            else_=0.0
+        )).label('revenue'),
+        func.count(distinct(Interaction.user_id)).label('unique_users')
+    ).filter(on_day).group_by(Interaction.artist_id).all()
     
-    for artist in artists:
-        # Get interactions for this artist on this date
-        interactions = db.query(Interaction).filter(
-            Interaction.artist_id == artist.id,
-            Interaction.timestamp >= start_date,
-            Interaction.timestamp < end_date
-        ).all()
-        
-        # Calculate metrics
-        total_views = sum(1 for i in interactions if i.interaction_type == 'view')
-        total_clicks = sum(1 for i in interactions if i.interaction_type == 'click')
-        total_purchases = sum(1 for i in interactions if i.interaction_type == 'purchase')
-        total_streams = sum(1 for i in interactions if i.interaction_type == 'stream')
-        total_social_engagements = sum(1 for i in interactions if i.interaction_type == 'social')
-        
-        # Conversion metrics
-        ctr = (total_clicks / total_views) if total_views > 0 else 0.0
-        conversion_rate = (total_purchases / total_clicks) if total_clicks > 0 else 0.0
-        
-        # Revenue metrics
-        purchase_interactions = [i for i in interactions if i.interaction_type == 'purchase']
-        total_revenue = sum(i.value or 0 for i in purchase_interactions)
-        avg_order_value = (total_revenue / total_purchases) if total_purchases > 0 else 0.0
-        
-        # User metrics
-        unique_users = len(set(i.user_id for i in interactions))
-        
-        # Check for new users (first interaction with this artist)
-        new_users = 0
-        for user_id in set(i.user_id for i in interactions):
-            first_interaction = db.query(Interaction).filter(
-                Interaction.user_id == user_id,
-                Interaction.artist_id == artist.id
-            ).order_by(Interaction.timestamp).first()
-            if first_interaction and first_interaction.timestamp >= start_date:
-                new_users += 1
-        
-        # Stream lift calculation (simplified - would need historical data for proper calculation)
-        stream_lift = 0.0  # Placeholder - would calculate vs baseline
-        
-        # Create or update daily metrics
-        daily_metrics = db.query(ArtistDailyMetrics).filter(
-            ArtistDailyMetrics.artist_id == artist.id,
-            ArtistDailyMetrics.date == start_date
-        ).first()
-        
-        if daily_metrics:
-            daily_metrics.total_views = total_views
-            daily_metrics.total_clicks = total_clicks
-            daily_metrics.total_purchases = total_purchases
-            daily_metrics.total_streams = total_streams
-            daily_metrics.total_social_engagements = total_social_engagements
-            daily_metrics.ctr = ctr
-            daily_metrics.conversion_rate = conversion_rate
-            daily_metrics.stream_lift = stream_lift
-            daily_metrics.total_revenue = total_revenue
-            daily_metrics.avg_order_value = avg_order_value
-            daily_metrics.unique_users = unique_users
-            daily_metrics.new_users = new_users
-        else:
-            daily_metrics = ArtistDailyMetrics(
-                artist_id=artist.id,
-                date=start_date,
-                total_views=total_views,
-                total_clicks=total_clicks,
-                total_purchases=total_purchases,
-                total_streams=total_streams,
-                total_social_engagements=total_social_engagements,
-                ctr=ctr,
-                conversion_rate=conversion_rate,
-                stream_lift=stream_lift,
-                total_revenue=total_revenue,
-                avg_order_value=avg_order_value,
-                unique_users=unique_users,
-                new_users=new_users
-            )
-            db.add(daily_metrics)
+    # New users: (user, artist) pairs active today whose first-ever interaction is today
+    day_pairs = db.query(Interaction.artist_id, Interaction.user_id).filter(on_day).distinct().subquery()
+    first_seen = db.query(
+        Interaction.artist_id,
+        Interaction.user_id,
+        func.min(Interaction.timestamp).label('first_ts')
+    ).join(day_pairs, and_(
+        Interaction.artist_id == day_pairs.c.artist_id,
+        Interaction.user_id == day_pairs.c.user_id
+    )).group_by(Interaction.artist_id, Interaction.user_id).subquery()
+    new_users = dict(db.query(
+        first_seen.c.artist_id, func.count()
+    ).filter(first_seen.c.first_ts >= start_date).group_by(first_seen.c.artist_id).all())
+    
+    by_artist = {
+        t.artist_id: {
+            'views': int(t.views),
+            'clicks': int(t.clicks),
+            'purchases': int(t.purchases),
+            'streams': int(t.streams),
+            'social': int(t.social),
+            'revenue': float(t.revenue or 0.0),
+            'unique_users': int(t.unique_users),
+            'new_users': new_users.get(t.artist_id, 0),
+        }
+        for t in totals
+    }
+    upsert_daily_metrics(db, start_date, by_artist)
+
+_NO_ACTIVITY = {
+    'views': 0, 'clicks': 0, 'purchases': 0, 'streams': 0, 'social': 0,
+    'revenue': 0.0, 'unique_users': 0, 'new_users': 0,
+}
+
+def upsert_daily_metrics(db: Session, day: datetime, by_artist: Dict[int, dict]):
+    """Store one day's metrics for every artist from per-artist counts (see _NO_ACTIVITY)"""
+    now = datetime.utcnow()
+    rows = []
+    # Every artist gets a row for the day, zeros included
+    for (artist_id,) in db.query(Artist.id).all():
+        t = by_artist.get(artist_id, _NO_ACTIVITY)
+        views, clicks, purchases, revenue = t['views'], t['clicks'], t['purchases'], t['revenue']
+        rows.append({
+            'artist_id': artist_id,
+            'date': day,
+            'total_views': views,
+            'total_clicks': clicks,
+            'total_purchases': purchases,
+            'total_streams': t['streams'],
+            'total_social_engagements': t['social'],
+            # Conversion metrics
+            'ctr': (clicks / views) if views > 0 else 0.0,
+            'conversion_rate': (purchases / clicks) if clicks > 0 else 0.0,
+            # Stream lift calculation (simplified - would need historical data for proper calculation)
+            'stream_lift': 0.0,
+            # Revenue metrics
+            'total_revenue': revenue,
+            'avg_order_value': (revenue / purchases) if purchases > 0 else 0.0,
+            # User metrics
+            'unique_users': t['unique_users'],
+            'new_users': t['new_users'],
+            'created_at': now
+        })
     
+    if rows:
+        upsert_insert = dialect_insert(db.get_bind())
+        stmt = upsert_insert(ArtistDailyMetrics)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ArtistDailyMetrics.artist_id, ArtistDailyMetrics.date],
+            set_={col: stmt.excluded[col] for col in _DAILY_METRIC_COLUMNS}
+        )
+        for chunk in _chunks(rows):
+            db.execute(stmt, chunk)
+        invalidate_on_commit(db, ARTIST_METRICS)
     db.commit()
 
 def get_top_artists_by_attribution(db: Session, limit: int = 10) -> List[dict]:
     """Get top artists by attribution score"""
+    # Reads the maintained leaderboard in avg_score index order instead of aggregating attributions
     results = db.query(
         Artist.name,
-        func.avg(Attribution.score).label('avg_score'),
-        func.count(Attribution.id).label('user_count'),
-        func.sum(Attribution.total_value).label('total_value')
-    ).join(Attribution).group_by(Artist.id).order_by(
-        desc('avg_score')
+        ArtistLeaderboard.avg_score,
+        ArtistLeaderboard.user_count,
+        ArtistLeaderboard.total_value
+    ).select_from(ArtistLeaderboard).join(
+        Artist, Artist.id == ArtistLeaderboard.artist_id
+    ).filter(ArtistLeaderboard.user_count > 0).order_by(
+        desc(ArtistLeaderboard.avg_score)
     ).limit(limit).all()
     
     return [
@@ -0,0 +1,37 @@
+"""Async entry points for the request handlers.
+
+Each function runs its app/crud.py (or app/ingest.py) counterpart on an AsyncSession
+via run_sync: the same query logic, but every round trip goes through the async driver
+and yields to the event loop instead of blocking it.
+"""
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, ingest
+
+async def create_interaction(db: AsyncSession, **fields) -> dict:
+    """Create an interaction; returns its id and timestamp"""
+    def _create(session):
+        interaction = crud.create_interaction(session, **fields)
+        return {"id": interaction.id, "timestamp": interaction.timestamp}
+    return await db.run_sync(_create)
+
+async def create_interactions_bulk(db: AsyncSession, events: List[dict]) -> int:
+    return await db.run_sync(crud.create_interactions_bulk, events)
+
+async def get_top_artists_by_attribution(db: AsyncSession, limit: int = 10) -> List[dict]:
+    return await db.run_sync(crud.get_top_artists_by_attribution, limit)
+
+async def rebuild_leaderboard(db: AsyncSession) -> int:
+    return await db.run_sync(crud.rebuild_leaderboard)
+
+async def get_artist_metrics(db: AsyncSession, artist_name: str, days: int = 30) -> dict:
+    return await db.run_sync(crud.get_artist_metrics, artist_name, days)
+
+async def compute_daily_metrics_for_date(db: AsyncSession, date: datetime):
+    await db.run_sync(crud.compute_daily_metrics_for_date, date)
+
+async def upsert_concerts(db: AsyncSession, events: Iterable[Optional[dict]]) -> int:
+    return await db.run_sync(ingest.upsert_concerts, list(events))
@@ -1,15 +1,185 @@
-from sqlalchemy import create_engine
+import logging
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .settings import settings
 
-engine = create_engine(settings.database_url)
+logger = logging.getLogger(__name__)
+
+def engine_options(url: str) -> dict:
+    """create_engine() keyword arguments for the configured pool profile"""
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite has no server-side connection cost; tuning happens in the PRAGMAs below.
+        # aiosqlite stays on NullPool here; see start_async_pool() for the app's pooled engine
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers proceed during a write; busy_timeout waits for the lock instead of
+        # failing with "database is locked"
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+    finally:
+        cursor.close()
+
+def _configure(engine_):
+    if engine_.dialect.name == "sqlite":
+        event.listen(engine_, "connect", _apply_sqlite_pragmas)
+    return engine_
+
+engine = _configure(create_engine(settings.database_url, **engine_options(settings.database_url)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async drivers for the sync URLs we accept in DATABASE_URL
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """Async-driver equivalent of a database URL (ASYNC_DATABASE_URL wins if set)"""
+    if settings.async_database_url:
+        return settings.async_database_url
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for database URL scheme '{parsed.drivername}'")
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+# Used by the request handlers; expire_on_commit=False keeps returned objects readable
+# after commit without an implicit (blocking) refresh
+_async_url = async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+_configure(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Pooled aiosqlite engine that AsyncSessionLocal uses while the app is running
+_pooled_async_engine = None
+
+def start_async_pool():
+    """Serve async sessions from a connection pool (file-based aiosqlite only).
+
+    On NullPool every aiosqlite session opens a connection and its worker thread and reruns
+    the PRAGMAs. A pooled connection, though, keeps a non-daemon thread alive until the pool is
+    disposed, which would hang interpreter exit. So pooling is only switched on for the app
+    lifespan, which ends with stop_async_pool(); scripts and the CLI stay on NullPool.
+    """
+    global _pooled_async_engine
+    parsed = make_url(_async_url)
+    if _pooled_async_engine is not None or parsed.get_driver_name() != "aiosqlite":
+        return
+    if parsed.database in (None, "", ":memory:"):
+        return
+    _pooled_async_engine = create_async_engine(
+        _async_url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    _configure(_pooled_async_engine.sync_engine)
+    AsyncSessionLocal.configure(bind=_pooled_async_engine)
+
+async def stop_async_pool():
+    """Close the pooled connections and their threads; sessions go back to async_engine"""
+    global _pooled_async_engine
+    if _pooled_async_engine is None:
+        return
+    pooled, _pooled_async_engine = _pooled_async_engine, None
+    AsyncSessionLocal.configure(bind=async_engine)
+    await pooled.dispose()
+
+def dialect_insert(bind):
+    """INSERT construct with ON CONFLICT support for the bound database"""
+    if bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif bind.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # The upserts use on_conflict_do_update(), which only these two dialects provide
+        raise NotImplementedError(f"Upserts are not supported on the '{bind.dialect.name}' dialect")
+    return insert
+
+# Tables recomputed from interactions and referenced by nothing: duplicate rows there
+# can be dropped to make way for a unique index
+_DERIVED_TABLES = {"artist_daily_metrics"}
+
+def _drop_duplicates(bind, index) -> int:
+    """Delete rows repeating `index`'s columns, keeping the newest (highest id) of each"""
+    table = index.table
+    columns = list(index.columns)
+    keep = select(func.max(table.c.id)).group_by(*columns)
+    with bind.begin() as conn:
+        return conn.execute(table.delete().where(table.c.id.not_in(keep))).rowcount
+
+def ensure_indexes(bind=engine):
+    """Create indexes declared on models that an existing database is missing.
+
+    Unique indexes are the ON CONFLICT targets of the upserts, which fail on every write
+    without them, so one that can't be built stops startup instead of being logged.
+    """
+    # create_all() only builds indexes together with new tables
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=bind, checkfirst=True)
+                continue
+            except SQLAlchemyError as e:
+                error = e
+            if index.unique and table.name in _DERIVED_TABLES:
+                dropped = _drop_duplicates(bind, index)
+                logger.warning("Dropped %d duplicate %s rows to create %s", dropped, table.name, index.name)
+                try:
+                    index.create(bind=bind, checkfirst=True)
+                    continue
+                except SQLAlchemyError as e:
+                    error = e
+            if index.unique:
+                columns = ", ".join(c.name for c in index.columns)
+                raise RuntimeError(
+                    f"Could not create unique index {index.name} on {table.name} ({columns}); "
+                    f"remove rows with duplicate ({columns}) and restart"
+                ) from error
+            logger.error("Could not create index %s: %s", index.name, error)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _pool_status(engine_) -> dict:
+    pool = engine_.pool
+    stats = {"class": type(pool).__name__}
+    # QueuePool and friends expose counters; NullPool/StaticPool don't
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, name, None)
+        if callable(fn):
+            stats[name] = fn()
+    return stats
+
+def pool_stats() -> dict:
+    """Connection pool counters for the sync and async engines"""
+    async_engine_ = _pooled_async_engine or async_engine
+    return {"sync": _pool_status(engine), "async": _pool_status(async_engine_.sync_engine)}
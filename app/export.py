@@ -0,0 +1,113 @@
+"""Streaming bulk export of interactions, attributions and daily metrics.
+
+Rows come from a server-side cursor in yield_per-sized partitions and are encoded one
+partition at a time, so memory stays flat however many rows match.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from .db import AsyncSessionLocal
+from .models import Artist, ArtistDailyMetrics, Attribution, Interaction, User
+
+EXPORT_BATCH_SIZE = 1000
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _interactions():
+    return select(
+        Interaction.id,
+        User.user_id,
+        Artist.name.label("artist_name"),
+        Interaction.concert_id,
+        Interaction.interaction_type,
+        Interaction.channel,
+        Interaction.timestamp,
+        Interaction.value,
+        Interaction.metadata_json,
+    ).join(User, User.id == Interaction.user_id).join(
+        Artist, Artist.id == Interaction.artist_id
+    ).order_by(Interaction.id), Interaction.timestamp
+
+def _attributions():
+    return select(
+        User.user_id,
+        Artist.name.label("artist_name"),
+        Attribution.score,
+        Attribution.interaction_count,
+        Attribution.total_value,
+        Attribution.last_interaction,
+        Attribution.updated_at,
+    ).join(User, User.id == Attribution.user_id).join(
+        Artist, Artist.id == Attribution.artist_id
+    ).order_by(Attribution.id), Attribution.last_interaction
+
+def _daily_metrics():
+    m = ArtistDailyMetrics
+    return select(
+        m.date,
+        Artist.name.label("artist_name"),
+        m.total_views,
+        m.total_clicks,
+        m.total_purchases,
+        m.total_streams,
+        m.total_social_engagements,
+        m.ctr,
+        m.conversion_rate,
+        m.stream_lift,
+        m.total_revenue,
+        m.avg_order_value,
+        m.unique_users,
+        m.new_users,
+    ).join(Artist, Artist.id == m.artist_id).order_by(m.date, m.artist_id), m.date
+
+# dataset -> builder returning (statement, column the date filters apply to)
+DATASETS = {
+    "interactions": _interactions,
+    "attributions": _attributions,
+    "daily-metrics": _daily_metrics,
+}
+
+def export_statement(dataset: str, start: Optional[date] = None, end: Optional[date] = None,
+                     artist: Optional[str] = None):
+    """SELECT for one dataset; end is an inclusive day"""
+    stmt, date_column = DATASETS[dataset]()
+    if start:
+        stmt = stmt.where(date_column >= datetime.combine(start, time.min))
+    if end:
+        stmt = stmt.where(date_column < datetime.combine(end + timedelta(days=1), time.min))
+    if artist:
+        stmt = stmt.where(Artist.name == artist)
+    return stmt
+
+def _value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _encode_ndjson(columns, rows) -> bytes:
+    return "".join(
+        json.dumps({col: _value(v) for col, v in zip(columns, row)}) + "\n" for row in rows
+    ).encode()
+
+def _encode_csv(columns, rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_value(v) for v in row] for row in rows)
+    return buffer.getvalue().encode()
+
+async def stream_export(stmt, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Encoded chunks of stmt's rows, one partition at a time"""
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    # Its own session: the response body outlives the request handler and its dependencies
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=batch_size))
+        columns = list(result.keys())
+        if fmt == "csv":
+            yield _encode_csv(columns, [columns])
+        async for rows in result.partitions():
+            yield encode(columns, rows)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from .settings import settings
+from .telemetry import parse_seconds, parse_wait_seconds, timed
+
+# schema.org Event and its subtypes; pages routinely use the specific type
+EVENT_TYPES = frozenset({
+    "Event", "BusinessEvent", "ChildrensEvent", "ComedyEvent", "CourseInstance",
+    "DanceEvent", "DeliveryEvent", "EducationEvent", "EventSeries", "ExhibitionEvent",
+    "Festival", "FoodEvent", "Hackathon", "LiteraryEvent", "MusicEvent",
+    "PublicationEvent", "BroadcastEvent", "OnDemandEvent", "SaleEvent",
+    "ScreeningEvent", "SocialEvent", "SportsEvent", "TheaterEvent", "VisualArtsEvent",
+})
+
+def _is_event(item: dict) -> bool:
+    types = item.get("@type")
+    if not isinstance(types, list):
+        types = [types]
+    for t in types:
+        # Accept compact and IRI forms, e.g. "schema:MusicEvent" or "https://schema.org/MusicEvent"
+        if isinstance(t, str) and t.rsplit("/", 1)[-1].rsplit(":", 1)[-1] in EVENT_TYPES:
+            return True
+    return False
+
+def _collect_events(payload, events: List[dict]):
+    if isinstance(payload, list):
+        for item in payload:
+            _collect_events(item, events)
+    elif isinstance(payload, dict):
+        if _is_event(payload):
+            events.append(payload)
+        elif isinstance(payload.get("@graph"), list):
+            _collect_events(payload["@graph"], events)
+
+def _is_ld_json(script_type: Optional[str]) -> bool:
+    return bool(script_type) and script_type.split(";", 1)[0].strip().lower() == "application/ld+json"
+
+class _PageTarget:
+    """lxml parser target that keeps only JSON-LD script text and, optionally, link hrefs"""
+
+    def __init__(self, collect_links: bool = False):
+        self.blocks = []
+        self.hrefs = [] if collect_links else None
+        self._buf = None
+
+    def start(self, tag, attrib):
+        if tag == "script" and _is_ld_json(attrib.get("type")):
+            self._buf = []
+        elif tag == "a" and self.hrefs is not None and attrib.get("href"):
+            self.hrefs.append(attrib["href"])
+
+    def end(self, tag):
+        if tag == "script" and self._buf is not None:
+            self.blocks.append("".join(self._buf))
+            self._buf = None
+
+    def data(self, data):
+        if self._buf is not None:
+            self._buf.append(data)
+
+    def close(self):
+        return self
+
+def _scan_fast(html: str, collect_links: bool = False) -> _PageTarget:
+    # Streams parser events into the target, so no element tree is ever built
+    parser = etree.HTMLParser(target=_PageTarget(collect_links), recover=True)
+    parser.feed(html)
+    return parser.close()
+
+def _ld_json_blocks_fast(html: str) -> List[str]:
+    return _scan_fast(html).blocks
+
+def _ld_json_blocks_soup(html: str) -> List[str]:
+    soup = BeautifulSoup(html, "lxml")
+    return [
+        tag.string or tag.text or ""
+        for tag in soup.find_all("script", type=_is_ld_json)
+    ]
+
+def ld_json_blocks(html: str) -> List[str]:
+    """Return the raw text of every JSON-LD script block in a page"""
+    try:
+        blocks = _ld_json_blocks_fast(html)
+    except Exception:
+        blocks = None
+    # Broken markup can hide scripts from libxml2's recovery; re-parse with the full soup
+    if not blocks and "ld+json" in html:
+        blocks = _ld_json_blocks_soup(html)
+    return blocks or []
+
+def _events_from_blocks(blocks: List[str]) -> List[dict]:
+    events = []
+    for block in blocks:
+        try:
+            payload = json.loads(block or "{}")
+        except Exception:
+            continue
+        _collect_events(payload, events)
+    return events
+
+def _same_origin_links(hrefs: List[str], base_url: str) -> List[str]:
+    origin = urlparse(base_url).netloc
+    links = []
+    for href in hrefs:
+        abs_url = urljoin(base_url, href)
+        if urlparse(abs_url).netloc == origin:
+            links.append(abs_url)
+    return links
+
+def extract_events(html: str) -> List[dict]:
+    """Return the schema.org Event objects found in a page's JSON-LD blocks"""
+    return _events_from_blocks(ld_json_blocks(html))
+
+def extract_page(html: str, base_url: str) -> Tuple[List[dict], List[str]]:
+    """Return (events, same-origin links) for a page in a single parse"""
+    try:
+        page = _scan_fast(html, collect_links=True)
+        blocks, hrefs = page.blocks, page.hrefs
+    except Exception:
+        blocks, hrefs = [], None
+    if hrefs is None or (not blocks and "ld+json" in html):
+        soup = BeautifulSoup(html, "lxml")
+        blocks = [tag.string or tag.text or "" for tag in soup.find_all("script", type=_is_ld_json)]
+        hrefs = [a.get("href") for a in soup.find_all("a", href=True)]
+    return _events_from_blocks(blocks), _same_origin_links(hrefs, base_url)
+
+# Parsing is CPU-bound, so it runs in a worker pool instead of on the event loop
+_executor: Optional[Executor] = None
+
+def get_parse_executor() -> Executor:
+    """Return the shared parse pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        workers = settings.parse_workers or None
+        if settings.parse_executor == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="parse")
+    return _executor
+
+def shutdown_parse_executor():
+    """Stop the parse pool; a new one is created lazily if needed again"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+async def run_in_parse_pool(fn, *args):
+    loop = asyncio.get_running_loop()
+    queued = time.perf_counter()
+    # Timed in the worker: with a process pool that's the only place the parse time is known
+    result, elapsed = await loop.run_in_executor(get_parse_executor(), timed, fn, *args)
+    parse_seconds.observe(elapsed, fn.__name__)
+    parse_wait_seconds.observe(max(0.0, time.perf_counter() - queued - elapsed), fn.__name__)
+    return result
+
+async def extract_events_async(html: str) -> List[dict]:
+    return await run_in_parse_pool(extract_events, html)
+
+async def extract_page_async(html: str, base_url: str) -> Tuple[List[dict], List[str]]:
+    return await run_in_parse_pool(extract_page, html, base_url)
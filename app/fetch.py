@@ -0,0 +1,82 @@
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import httpx
+
+from .ratelimit import upstream
+from .settings import settings
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+FetchResult = Tuple[str, Optional[httpx.Response], Optional[Exception]]
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL, used for crawl de-duplication and cache keys"""
+    parts = urlparse(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(TRACKING_PARAMS)
+    ))
+    return urlunparse((scheme, host, path, "", query, ""))
+
+async def fetch_many(
+    client: httpx.AsyncClient,
+    urls: Iterable[str],
+    concurrency: Optional[int] = None,
+    per_host: Optional[int] = None,
+    timeout: Optional[float] = None,
+    headers: Optional[dict] = None,
+) -> AsyncIterator[FetchResult]:
+    """Fetch URLs concurrently and yield (url, response, error) in completion order.
+
+    Each GET goes through the shared per-host limiter, so retries and throttling apply.
+    """
+    concurrency = concurrency or settings.scrape_concurrency
+    per_host = per_host or settings.scrape_per_host_concurrency
+    timeout = timeout or settings.scrape_url_timeout
+    headers = headers or DEFAULT_HEADERS
+
+    global_limit = asyncio.Semaphore(concurrency)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(per_host))
+
+    async def _fetch(url: str) -> FetchResult:
+        try:
+            host = urlparse(url).netloc
+        except ValueError as e:
+            # e.g. an unclosed IPv6 bracket; report it for this URL, not the whole batch
+            return url, None, e
+        # Global slots are held only on the wire, so a throttled or backing-off host
+        # can't starve the others
+        async with host_limits[host]:
+            try:
+                # The timeout applies per attempt, so a host that asks us to wait (Retry-After)
+                # is retried rather than timed out
+                r = await upstream.get(
+                    client, url, headers=headers, gate=global_limit, attempt_timeout=timeout
+                )
+                return url, r, None
+            except asyncio.TimeoutError:
+                return url, None, TimeoutError(f"timed out after {timeout}s")
+            except Exception as e:
+                return url, None, e
+
+    tasks = [asyncio.create_task(_fetch(url)) for url in urls]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        # Consumer stopped early (client disconnect, error): don't leak fetches
+        for task in tasks:
+            task.cancel()
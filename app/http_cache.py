@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from .fetch import normalize_url
+from .ratelimit import upstream
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the wire encoding rather than the (already decoded) body we store
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+def cache_key(url: str, params: Optional[dict] = None) -> str:
+    """Stable key for a GET request: normalized URL plus sorted params"""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+    raw = normalize_url(url) + "\n" + json.dumps(items)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+class ResponseCache:
+    """Size-bounded LRU store of GET responses in a local SQLite file"""
+
+    def __init__(self, path: str, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_access ON responses (last_access)")
+        # Running entry count and byte total, kept by triggers so eviction checks are O(1)
+        # and stay right when several worker processes share the file
+        self._conn.executescript("""
+            BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS responses_totals (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                entries INTEGER NOT NULL,
+                bytes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO responses_totals SELECT 1, COUNT(*), COALESCE(SUM(size), 0) FROM responses;
+            CREATE TRIGGER IF NOT EXISTS responses_totals_insert AFTER INSERT ON responses BEGIN
+                UPDATE responses_totals SET entries = entries + 1, bytes = bytes + NEW.size;
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_totals_delete AFTER DELETE ON responses BEGIN
+                UPDATE responses_totals SET entries = entries - 1, bytes = bytes - OLD.size;
+            END;
+            CREATE TRIGGER IF NOT EXISTS responses_totals_update AFTER UPDATE OF size ON responses BEGIN
+                UPDATE responses_totals SET bytes = bytes - OLD.size + NEW.size;
+            END;
+            COMMIT;
+        """)
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, etag, last_modified, expires_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        status, headers, body, etag, last_modified, expires_at = row
+        return {
+            "status": status,
+            "headers": json.loads(headers),
+            "body": body,
+            "etag": etag,
+            "last_modified": last_modified,
+            "expires_at": expires_at,
+        }
+
+    def put(self, key: str, url: str, response: httpx.Response, ttl: float):
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS}
+        body = response.content
+        now = time.time()
+        with self._lock:
+            # An upsert rather than INSERT OR REPLACE: REPLACE's implicit delete skips the triggers
+            self._conn.execute(
+                """
+                INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    url = excluded.url, status = excluded.status, headers = excluded.headers,
+                    body = excluded.body, etag = excluded.etag, last_modified = excluded.last_modified,
+                    expires_at = excluded.expires_at, last_access = excluded.last_access, size = excluded.size
+                """,
+                (
+                    key, url, response.status_code, json.dumps(headers), body,
+                    response.headers.get("etag"), response.headers.get("last-modified"),
+                    now + ttl, now, len(body),
+                ),
+            )
+            self._evict()
+            self._conn.commit()
+        self.stats["stores"] += 1
+
+    def refresh(self, key: str, ttl: float):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ? WHERE key = ?", (now + ttl, now, key)
+            )
+            self._conn.commit()
+
+    def _totals(self):
+        return self._conn.execute("SELECT entries, bytes FROM responses_totals").fetchone()
+
+    def _evict(self):
+        count, total = self._totals()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # Walk the least-recently-used rows only as far as needed for both bounds to hold
+        victims = []
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access")
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        rows.close()
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.stats["evictions"] += len(victims)
+
+    def summary(self) -> dict:
+        with self._lock:
+            entries, size = self._totals()
+        return {**self.stats, "entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[ResponseCache] = None
+_cache_failed = False
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the shared cache, or None if disabled or the cache file can't be opened"""
+    global _cache, _cache_failed
+    if _cache is None and settings.http_cache_enabled and not _cache_failed:
+        try:
+            _cache = ResponseCache(
+                settings.http_cache_path,
+                max_entries=settings.http_cache_max_entries,
+                max_bytes=settings.http_cache_max_bytes,
+            )
+        except (OSError, sqlite3.Error) as e:
+            # e.g. read-only filesystem on serverless hosts; fetch uncached
+            logger.warning("HTTP response cache disabled: %s", e)
+            _cache_failed = True
+    return _cache
+
+def close_response_cache():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
+
+def _cached_response(url: str, entry: dict) -> httpx.Response:
+    return httpx.Response(
+        entry["status"],
+        headers=entry["headers"],
+        content=entry["body"],
+        request=httpx.Request("GET", url),
+    )
+
+async def cached_get(
+    client: httpx.AsyncClient,
+    url: str,
+    params: Optional[dict] = None,
+    headers: Optional[dict] = None,
+    ttl: Optional[float] = None,
+    **kwargs,
+) -> httpx.Response:
+    """GET through the response cache, revalidating stale entries with ETag/Last-Modified"""
+    cache = get_response_cache()
+    if cache is None:
+        return await upstream.get(client, url, params=params, headers=headers, **kwargs)
+    ttl = settings.http_cache_ttl if ttl is None else ttl
+    key = cache_key(url, params)
+
+    entry = await asyncio.to_thread(cache.get, key)
+    if entry is not None and entry["expires_at"] > time.time():
+        cache.stats["hits"] += 1
+        return _cached_response(url, entry)
+
+    request_headers = dict(headers or {})
+    if entry is not None:
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    r = await upstream.get(client, url, params=params, headers=request_headers, **kwargs)
+    if r.status_code == 304 and entry is not None:
+        cache.stats["revalidated"] += 1
+        await asyncio.to_thread(cache.refresh, key, ttl)
+        return _cached_response(url, entry)
+
+    cache.stats["misses"] += 1
+    if r.status_code == 200 and "no-store" not in r.headers.get("cache-control", ""):
+        await asyncio.to_thread(cache.put, key, normalize_url(url), r, ttl)
+    return r
@@ -0,0 +1,36 @@
+import logging
+
+import httpx
+from fastapi import Request
+
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def create_http_client() -> httpx.AsyncClient:
+    """Build the application-lifetime pooled HTTP client"""
+    http2 = settings.http2
+    if http2 and not _http2_available():
+        logger.warning("HTTP2=true but the 'h2' package is not installed; falling back to HTTP/1.1")
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=settings.http_timeout, http2=http2)
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """FastAPI dependency returning the shared HTTP client"""
+    client = getattr(request.app.state, "http_client", None)
+    if client is None:
+        # Lifespan didn't run (e.g. serverless adapters); create the pool on first use
+        client = request.app.state.http_client = create_http_client()
+    return client
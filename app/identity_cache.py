@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable
+
+from .settings import settings
+
+class IdentityCache:
+    """Thread-safe LRU of natural key -> primary key (artist name, external user_id).
+
+    Rows are never renamed or deleted, so entries only leave by eviction.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._ids: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, int]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                pk = self._ids.get(key)
+                if pk is None:
+                    self.misses += 1
+                    continue
+                self._ids.move_to_end(key)
+                found[key] = pk
+                self.hits += 1
+        return found
+
+    def put_many(self, ids: Dict[Hashable, int]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            for key, pk in ids.items():
+                self._ids[key] = pk
+                self._ids.move_to_end(key)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+    def summary(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._ids),
+        }
+
+artist_ids = IdentityCache(settings.identity_cache_max_entries)
+user_ids = IdentityCache(settings.identity_cache_max_entries)
+
+def identity_cache_summary() -> dict:
+    return {"artists": artist_ids.summary(), "users": user_ids.summary()}
@@ -0,0 +1,92 @@
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import and_, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .db import Base
+from .models import Artist, ArtistDailyMetrics, ArtistLeaderboard, Attribution, Concert, Interaction, User
+
+logger = logging.getLogger(__name__)
+
+def hot_queries(db: Session) -> List[tuple]:
+    """(name, query) pairs mirroring the lookups in app/crud.py, app/ingest.py and app/backfill.py"""
+    day = datetime(2024, 1, 1)
+    on_day = and_(Interaction.timestamp >= day, Interaction.timestamp < day + timedelta(days=1))
+    day_pairs = db.query(Interaction.artist_id, Interaction.user_id).filter(on_day).distinct().subquery()
+    return [
+        ("artist_by_name", db.query(Artist).filter(Artist.name == "x")),
+        ("user_by_user_id", db.query(User).filter(User.user_id == "x")),
+        ("interactions_for_user", db.query(Interaction).filter(Interaction.user_id == 1)),
+        ("interactions_for_pair", db.query(Interaction).filter(
+            Interaction.user_id == 1, Interaction.artist_id == 1
+        )),
+        ("attribution_for_pair", db.query(Attribution).filter(
+            Attribution.user_id == 1, Attribution.artist_id == 1
+        )),
+        ("top_artists", db.query(ArtistLeaderboard.artist_id, Artist.name).join(
+            Artist, Artist.id == ArtistLeaderboard.artist_id
+        ).filter(ArtistLeaderboard.user_count > 0).order_by(ArtistLeaderboard.avg_score.desc()).limit(10)),
+        ("daily_totals", db.query(
+            Interaction.artist_id, func.count(), func.count(func.distinct(Interaction.user_id))
+        ).filter(on_day).group_by(Interaction.artist_id)),
+        ("daily_first_seen", db.query(
+            Interaction.artist_id, Interaction.user_id, func.min(Interaction.timestamp)
+        ).join(day_pairs, and_(
+            Interaction.artist_id == day_pairs.c.artist_id,
+            Interaction.user_id == day_pairs.c.user_id
+        )).group_by(Interaction.artist_id, Interaction.user_id)),
+        ("daily_metrics_for_artist", db.query(ArtistDailyMetrics).filter(
+            ArtistDailyMetrics.artist_id == 1, ArtistDailyMetrics.date >= day
+        ).order_by(ArtistDailyMetrics.date)),
+        ("backfill_new_days", db.query(func.date(Interaction.timestamp)).filter(
+            Interaction.id > 1, Interaction.id <= 2
+        ).distinct()),
+        ("concert_by_source", db.query(Concert).filter(
+            Concert.source == "seatgeek", Concert.source_id == "1"
+        )),
+    ]
+
+def _explain(db: Session, statement) -> List[str]:
+    bind = db.get_bind()
+    compiled = statement.compile(dialect=bind.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    prefix = "EXPLAIN QUERY PLAN " if bind.dialect.name == "sqlite" else "EXPLAIN "
+    rows = db.connection().exec_driver_sql(prefix + str(compiled), params).fetchall()
+    # SQLite rows are (id, parent, notused, detail); Postgres returns one text column
+    return [str(row[-1]) for row in rows]
+
+# "SCAN interactions" (no index) on SQLite, "Seq Scan on interactions" on Postgres
+_FULL_SCAN = re.compile(r"^\s*(?:SCAN (?:TABLE )?(\w+)(?!.*USING)|.*Seq Scan on (\w+))")
+
+def check_query_plans(engine: Engine) -> List[dict]:
+    """EXPLAIN each hot query and report the tables it reads with a full scan"""
+    report = []
+    with Session(bind=engine) as db:
+        for name, query in hot_queries(db):
+            plan = _explain(db, query.statement)
+            scans = []
+            for line in plan:
+                match = _FULL_SCAN.match(line)
+                # Scans of materialized subqueries are expected; only real tables count
+                if match and (match.group(1) or match.group(2)) in Base.metadata.tables:
+                    scans.append(match.group(1) or match.group(2))
+            report.append({"query": name, "plan": plan, "full_scans": scans})
+    return report
+
+def log_query_plan_warnings(engine: Engine) -> int:
+    """Log a warning per hot query that full-scans a table; returns how many did"""
+    flagged = 0
+    for entry in check_query_plans(engine):
+        if entry["full_scans"]:
+            flagged += 1
+            logger.warning(
+                "Query %s does a full scan of %s: %s",
+                entry["query"], ", ".join(entry["full_scans"]), " | ".join(entry["plan"])
+            )
+    return flagged
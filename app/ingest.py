@@ -0,0 +1,132 @@
+import hashlib
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .crud import resolve_artist_ids
+from .db import dialect_insert
+from .models import Concert
+
+# Concert columns refreshed when an already-stored event is scraped again
+_UPDATE_COLUMNS = (
+    "title", "artist_id", "venue_name", "venue_city", "venue_state",
+    "venue_country", "event_date", "ticket_url",
+)
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # Event times are stored as local wall-clock time, like SeatGeek's datetime_local
+    return parsed.replace(tzinfo=None)
+
+def _clip(value, length: int) -> Optional[str]:
+    if value is None:
+        return None
+    return str(value)[:length]
+
+def _source_id(value: str) -> str:
+    # source_id is String(100); long ids (usually URLs) are hashed to fit
+    return value if len(value) <= 100 else hashlib.sha1(value.encode()).hexdigest()
+
+def normalize_seatgeek_event(ev: dict) -> Optional[dict]:
+    """Concert row for an event as returned by /scrape/seatgeek"""
+    performers = ev.get("performers") or []
+    if ev.get("id") is None or not performers or not ev.get("title"):
+        return None
+    venue = ev.get("venue") or {}
+    return {
+        "title": _clip(ev["title"], 255),
+        "artist_name": performers[0],
+        "venue_name": _clip(venue.get("name"), 255),
+        "venue_city": _clip(venue.get("city"), 100),
+        "venue_state": _clip(venue.get("state"), 100),
+        "venue_country": _clip(venue.get("country"), 100),
+        "event_date": _parse_datetime(ev.get("datetime_local")),
+        "ticket_url": _clip(ev.get("url"), 500),
+        "source": "seatgeek",
+        "source_id": str(ev["id"]),
+    }
+
+def _performer_name(item: dict) -> Optional[str]:
+    performer = item.get("performer")
+    if isinstance(performer, list):
+        performer = performer[0] if performer else None
+    if isinstance(performer, dict):
+        performer = performer.get("name")
+    return performer if isinstance(performer, str) and performer.strip() else None
+
+def _text(value) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get("name")
+    return value if isinstance(value, str) else None
+
+def normalize_jsonld_event(item: dict, page_url: str) -> Optional[dict]:
+    """Concert row for a schema.org Event scraped from page_url"""
+    artist_name = _performer_name(item)
+    title = item.get("name")
+    if not artist_name or not isinstance(title, str):
+        return None
+    location = item.get("location")
+    if isinstance(location, list):
+        location = location[0] if location else None
+    venue_name, address = None, {}
+    if isinstance(location, dict):
+        venue_name = location.get("name")
+        address = location.get("address") if isinstance(location.get("address"), dict) else {}
+    elif isinstance(location, str):
+        venue_name = location
+    offers = item.get("offers")
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    ticket_url = offers.get("url") if isinstance(offers, dict) else None
+    # Prefer the publisher's identifier; otherwise key on what makes the listing unique
+    identity = item.get("@id") or item.get("url") or "|".join(
+        str(part) for part in (page_url, title, item.get("startDate"), venue_name)
+    )
+    return {
+        "title": _clip(title, 255),
+        "artist_name": _clip(artist_name.strip(), 255),
+        "venue_name": _clip(_text(venue_name), 255),
+        "venue_city": _clip(_text(address.get("addressLocality")), 100),
+        "venue_state": _clip(_text(address.get("addressRegion")), 100),
+        "venue_country": _clip(_text(address.get("addressCountry")), 100),
+        "event_date": _parse_datetime(item.get("startDate")),
+        "ticket_url": _clip(ticket_url or item.get("url") or page_url, 500),
+        "source": "url_scrape",
+        "source_id": _source_id(str(identity)),
+    }
+
+def upsert_concerts(db: Session, events: Iterable[Optional[dict]], batch_size: int = 500) -> int:
+    """Bulk-upsert normalized events into concerts on (source, source_id)"""
+    # ON CONFLICT may not touch the same row twice in one statement, so de-dup first
+    unique = {}
+    for ev in events:
+        if ev:
+            unique[(ev["source"], ev["source_id"])] = ev
+    if not unique:
+        return 0
+
+    artist_ids = resolve_artist_ids(db, (ev["artist_name"] for ev in unique.values()))
+    now = datetime.utcnow()
+    rows: List[dict] = []
+    for ev in unique.values():
+        row = {k: v for k, v in ev.items() if k != "artist_name"}
+        row["artist_id"] = artist_ids[ev["artist_name"]]
+        row["created_at"] = now
+        rows.append(row)
+
+    insert = dialect_insert(db.get_bind())
+    stmt = insert(Concert)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Concert.source, Concert.source_id],
+        set_={col: stmt.excluded[col] for col in _UPDATE_COLUMNS},
+    )
+    for i in range(0, len(rows), batch_size):
+        db.execute(stmt, rows[i:i + batch_size])
+    db.commit()
+    return len(rows)
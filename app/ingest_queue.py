@@ -0,0 +1,217 @@
+"""Write-behind buffer for POST /interactions.
+
+Accepted events go into a bounded in-process queue (and, if INGEST_JOURNAL_PATH is set,
+a JSONL journal) and a background task inserts them in micro-batches through
+create_interactions_bulk. Delivery is at-least-once: events journaled but not yet
+acknowledged when the process dies are written on the next start, so a crash between a
+commit and its ack line can write that batch twice.
+"""
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from . import crud_async
+from .db import AsyncSessionLocal
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+async def write_interactions(events: List[dict]) -> int:
+    async with AsyncSessionLocal() as db:
+        return await crud_async.create_interactions_bulk(db, events)
+
+def _for_insert(event: dict) -> dict:
+    row = dict(event)
+    if isinstance(row.get("timestamp"), str):
+        row["timestamp"] = datetime.fromisoformat(row["timestamp"])
+    return row
+
+# Lock contention and dropped connections clear up on their own; anything else an
+# OperationalError covers ("no such table", a corrupt file) won't, so don't retry it
+_TRANSIENT_ERRORS = ("locked", "busy", "timeout", "timed out", "connect", "connection")
+
+def _transient(e: OperationalError) -> bool:
+    return e.connection_invalidated or any(text in str(e.orig).lower() for text in _TRANSIENT_ERRORS)
+
+class IngestQueue:
+    """Bounded queue of interaction events flushed to the database in micro-batches"""
+
+    def __init__(
+        self,
+        max_pending: int,
+        batch_size: int,
+        flush_interval: float,
+        journal_path: Optional[str] = None,
+        write: Callable[[List[dict]], Awaitable[int]] = write_interactions,
+        write_retries: int = 10,
+    ):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.write_retries = write_retries
+        self._write = write
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._journal = None
+        self._seq = 0
+        self.stats = {"accepted": 0, "rejected": 0, "written": 0, "batches": 0, "dropped": 0, "retries": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._writer is not None and not self._writer.done()
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self):
+        """Write anything left in the journal, then start the background writer"""
+        if self.running:
+            return
+        if self.journal_path:
+            leftover = self._read_journal()
+            if leftover:
+                logger.info("Replaying %d journaled interactions", len(leftover))
+                for i in range(0, len(leftover), self.batch_size):
+                    await self._write_batch(leftover[i:i + self.batch_size])
+            directory = os.path.dirname(self.journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Everything earlier is in the database now; start a fresh journal
+            self._journal = open(self.journal_path, "w", encoding="utf-8")
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._writer = asyncio.create_task(self._run())
+
+    def submit(self, event: dict) -> bool:
+        """Queue one JSON-serializable event; False when the queue is full or not running"""
+        if not self.running:
+            return False
+        if self._queue.full():
+            self.stats["rejected"] += 1
+            return False
+        self._seq += 1
+        if self._journal is not None:
+            self._journal.write(json.dumps({"seq": self._seq, "event": event}) + "\n")
+            self._journal.flush()
+        self._queue.put_nowait((self._seq, event))
+        self.stats["accepted"] += 1
+        return True
+
+    async def stop(self, timeout: Optional[float] = None):
+        """Stop accepting events and flush what's queued, waiting up to timeout seconds"""
+        if self._writer is None:
+            return
+        writer, self._writer = self._writer, None
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            kept = "kept in the journal" if self._journal is not None else "lost"
+            logger.warning("Shutdown flush timed out; %d queued interactions %s", self.pending(), kept)
+        writer.cancel()
+        try:
+            await writer
+        except asyncio.CancelledError:
+            pass
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Collect more for up to flush_interval so bursts go out as one insert
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write_batch([event for _, event in batch])
+            except Exception:
+                self.stats["dropped"] += len(batch)
+                logger.exception("Dropped a batch of %d interactions", len(batch))
+            try:
+                self._ack(batch[-1][0])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, events: List[dict]):
+        rows = [_for_insert(event) for event in events]
+        delay = 0.1
+        for attempt in range(self.write_retries + 1):
+            try:
+                self.stats["written"] += await self._write(rows)
+                self.stats["batches"] += 1
+                return
+            except OperationalError as e:
+                if not _transient(e) or attempt == self.write_retries:
+                    logger.exception("Interaction batch write failed; writing events one at a time")
+                    break
+                # Locked or unreachable database: keep the batch and try again. A failed
+                # write commits nothing, so retrying (or going row by row) can't duplicate rows
+                self.stats["retries"] += 1
+                logger.warning("Interaction batch write failed, retrying in %.1fs: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 5.0)
+            except SQLAlchemyError:
+                logger.exception("Interaction batch rejected; writing events one at a time")
+                break
+        # A bad row (e.g. an unknown concert_id) must not block the rest of the batch
+        for row in rows:
+            try:
+                self.stats["written"] += await self._write([row])
+            except SQLAlchemyError as e:
+                self.stats["dropped"] += 1
+                logger.error("Dropped interaction %s: %s", row, e)
+
+    def _ack(self, seq: int):
+        if self._journal is None:
+            return
+        if self._queue.qsize() == 0:
+            # Everything journaled so far is written; start the file over to bound its size
+            self._journal.seek(0)
+            self._journal.truncate()
+        else:
+            self._journal.write(json.dumps({"ack": seq}) + "\n")
+        self._journal.flush()
+
+    def _read_journal(self) -> List[dict]:
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries: List[Tuple[int, dict]] = []
+        acked = 0
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write
+                continue
+            if "ack" in record:
+                acked = max(acked, record["ack"])
+            else:
+                entries.append((record["seq"], record["event"]))
+        return [event for seq, event in entries if seq > acked]
+
+    def summary(self) -> dict:
+        return {**self.stats, "running": self.running, "pending": self.pending(), "max_pending": self.max_pending}
+
+ingest_queue = IngestQueue(
+    max_pending=settings.ingest_queue_max,
+    batch_size=settings.ingest_batch_size,
+    flush_interval=settings.ingest_flush_interval,
+    journal_path=settings.ingest_journal_path,
+    write_retries=settings.ingest_write_retries,
+)
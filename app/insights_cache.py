@@ -0,0 +1,131 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .settings import settings
+
+# Tags for the data each cached read depends on
+TOP_ARTISTS = "top_artists"          # the artist leaderboard
+ARTIST_METRICS = "artist_metrics"    # artist_daily_metrics rows
+
+class CachedBody:
+    """A serialized response body with its ETag"""
+
+    __slots__ = ("body", "etag", "expires_at", "tags")
+
+    def __init__(self, body: bytes, expires_at: float, tags: Set[str]):
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.expires_at = expires_at
+        self.tags = tags
+
+class InsightsCache:
+    """Bounded in-process LRU of JSON read results with a TTL and tag-based invalidation"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stale_puts": 0}
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        # Bumped by every invalidation of a tag; lets a reader tell its result went stale
+        self._generations: Dict[str, int] = {}
+        # Invalidations arrive from backfill worker threads as well as the event loop
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+    def generation(self, tags: Iterable[str]) -> Tuple[int, ...]:
+        """Current invalidation generation of tags; take it before reading what you will put"""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def put(self, key: Hashable, value: Any, tags: Iterable[str],
+            generation: Optional[Tuple[int, ...]] = None) -> CachedBody:
+        """Serialize value and store it (unless caching is disabled); returns the entry either way.
+
+        With `generation` (from generation(tags) before the read), a value that an
+        invalidation overtook while it was being read is returned but not stored.
+        """
+        tags = list(tags)
+        body = json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+        entry = CachedBody(body, time.monotonic() + self.ttl, set(tags))
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return entry
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(tag, 0) for tag in tags):
+                self.stats["stale_puts"] += 1
+                return entry
+            self._drop(key)
+            self._entries[key] = entry
+            for tag in entry.tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+        return entry
+
+    def invalidate(self, *tags: str):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in self._tags.pop(tag, ()):
+                    self._drop(key)
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+insights_cache = InsightsCache(settings.insights_cache_max_entries, settings.insights_cache_ttl)
+
+def invalidate_on_commit(db: Session, *tags: str):
+    """Drop cached reads tagged with tags once db's current transaction commits"""
+    db.info.setdefault("invalidate_tags", set()).update(tags)
+
+# Invalidating only after commit means a reader can't cache rows older than the invalidation
+# by reading before the commit; one whose read was in flight when the commit landed is caught
+# by the generation check in put()
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session):
+    tags = session.info.pop("invalidate_tags", None)
+    if tags:
+        insights_cache.invalidate(*tags)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session):
+    session.info.pop("invalidate_tags", None)
@@ -1,21 +1,55 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from .api import router
-from .db import Base, engine
+from .crud import seed_leaderboard
+from .db import Base, SessionLocal, async_engine, engine, ensure_indexes, start_async_pool, stop_async_pool
+from .extract import shutdown_parse_executor
+from .http_cache import close_response_cache
+from .http_client import create_http_client
+from .ingest_queue import ingest_queue
+from .index_advisor import log_query_plan_warnings
 from .settings import settings
+from .telemetry import RequestMetricsMiddleware
 import os
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled HTTP client for the whole process so keep-alive connections are reused
+    app.state.http_client = create_http_client()
+    start_async_pool()
+    await ingest_queue.start()
+    try:
+        yield
+    finally:
+        # Drain queued interactions while the database engine is still open
+        await ingest_queue.stop(settings.ingest_shutdown_timeout)
+        await app.state.http_client.aclose()
+        shutdown_parse_executor()
+        close_response_cache()
+        await stop_async_pool()
+        await async_engine.dispose()
+
 # Create FastAPI app
 app = FastAPI(
     title="TicketScrapingApp",
     description="Multi-channel data pipeline for concert/ticketing data with attribution and conversion metrics",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Create database tables (only if not in Vercel)
 if not os.environ.get("VERCEL"):
     Base.metadata.create_all(bind=engine)
+    ensure_indexes(engine)
+    with SessionLocal() as db:
+        seed_leaderboard(db)
+    if settings.index_check_on_startup:
+        log_query_plan_warnings(engine)
+
+# Per-route latency and SQL timings for GET /metrics
+app.add_middleware(RequestMetricsMiddleware)
 
 # Include API router
 app.include_router(router)
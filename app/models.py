@@ -1,9 +1,7 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
-
-Base = declarative_base()
+from .db import Base
 
 class Artist(Base):
     __tablename__ = "artists"
@@ -34,6 +32,10 @@ class User(Base):
 
 class Concert(Base):
     __tablename__ = "concerts"
+    __table_args__ = (
+        # Upsert target for scraped events
+        Index("uq_concerts_source_source_id", "source", "source_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -54,6 +56,14 @@ class Concert(Base):
 
 class Interaction(Base):
     __tablename__ = "interactions"
+    __table_args__ = (
+        # Per-user attribution, per-pair history and first-interaction (MIN) lookups
+        Index("ix_interactions_user_artist_timestamp", "user_id", "artist_id", "timestamp"),
+        # Per-artist history in a time window
+        Index("ix_interactions_artist_timestamp", "artist_id", "timestamp"),
+        # Day-range scans in daily metrics and backfill
+        Index("ix_interactions_timestamp", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -72,6 +82,11 @@ class Interaction(Base):
 
 class Attribution(Base):
     __tablename__ = "attributions"
+    __table_args__ = (
+        # One running score per (user, artist)
+        Index("uq_attributions_user_artist", "user_id", "artist_id", unique=True),
+        Index("ix_attributions_artist_id", "artist_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -89,6 +104,10 @@ class Attribution(Base):
 
 class ArtistDailyMetrics(Base):
     __tablename__ = "artist_daily_metrics"
+    __table_args__ = (
+        # One row per artist per day; upsert target for compute_daily_metrics_for_date
+        Index("uq_artist_daily_metrics_artist_date", "artist_id", "date", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     artist_id = Column(Integer, ForeignKey("artists.id"), nullable=False)
@@ -118,3 +137,26 @@ class ArtistDailyMetrics(Base):
     
     # Relationships
     artist = relationship("Artist", back_populates="daily_metrics")
+
+class JobWatermark(Base):
+    __tablename__ = "job_watermarks"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)  # e.g. daily_metrics
+    last_interaction_id = Column(Integer, nullable=False, default=0)  # highest interaction id processed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ArtistLeaderboard(Base):
+    __tablename__ = "artist_leaderboard"
+    __table_args__ = (
+        # /insights/top-artists reads the first `limit` rows of this index
+        Index("ix_artist_leaderboard_avg_score", "avg_score"),
+    )
+    
+    # Running aggregates over attributions, maintained alongside every attribution write
+    artist_id = Column(Integer, ForeignKey("artists.id"), primary_key=True)
+    score_sum = Column(Float, nullable=False, default=0.0)
+    user_count = Column(Integer, nullable=False, default=0)
+    total_value = Column(Float, nullable=False, default=0.0)
+    avg_score = Column(Float, nullable=False, default=0.0)  # score_sum / user_count
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,289 @@
+import asyncio
+import contextlib
+import email.utils
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from .settings import settings
+from .telemetry import upstream_host_label, upstream_request_seconds
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        # The lock queues waiters so tokens are handed out in FIFO order
+        async with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+class HostRateLimiter:
+    """One token bucket per host"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, host: str):
+        await self.bucket(host).acquire()
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket whose rate follows AIMD: creep up on success, halve on throttling"""
+
+    def __init__(self, rate: float, burst: float, min_rate: float, max_rate: float):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            # Honor a Retry-After pause before handing out tokens
+            wait = self.paused_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._refill()
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def increase(self):
+        self._refill()
+        self.rate = min(self.max_rate, self.rate + settings.upstream_rate_increase)
+
+    def decrease(self, factor: float):
+        now = time.monotonic()
+        # Requests already in flight report the same congestion; back off once per second
+        if now - self._last_decrease < 1.0:
+            return
+        self._last_decrease = now
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * factor)
+        self.tokens = min(self.tokens, 1.0)
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"{host} is failing; not retrying for {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """Open after `threshold` consecutive failures; let one trial request through after `cooldown`"""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def check(self, host: str):
+        state = self.state
+        if state == "closed":
+            return
+        now = time.monotonic()
+        # One trial per cooldown, so a trial that never reports back can't wedge the breaker
+        if state == "half-open" and (self._trial_at is None or now - self._trial_at >= self.cooldown):
+            self._trial_at = now
+            return
+        raise CircuitOpenError(host, max(0.0, self.opened_at + self.cooldown - now))
+
+    def success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            # A failed trial re-opens for another full cooldown
+            if self.opened_at is None:
+                logger.warning("Circuit opened after %d consecutive failures", self.failures)
+            self.opened_at = time.monotonic()
+            self._trial_at = None
+
+# Statuses that mean "slow down" rather than "broken"
+THROTTLE_STATUSES = {429, 503}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Retry-After as seconds; it may be a delay or an HTTP date"""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+class UpstreamGovernor:
+    """Shared per-host adaptive rate limits, retries with jittered backoff, and circuit breakers"""
+
+    def __init__(self, max_hosts: Optional[int] = None):
+        self.max_hosts = max_hosts or settings.upstream_max_hosts
+        # host -> (bucket, breaker, stats), least recently used first
+        self._hosts: OrderedDict = OrderedDict()
+
+    def _host(self, host: str):
+        state = self._hosts.get(host)
+        if state is not None:
+            self._hosts.move_to_end(host)
+            return state
+        state = self._hosts[host] = (
+            AdaptiveTokenBucket(
+                settings.upstream_rate_per_host,
+                settings.upstream_burst_per_host,
+                min_rate=settings.upstream_min_rate_per_host,
+                max_rate=settings.upstream_max_rate_per_host,
+            ),
+            CircuitBreaker(settings.upstream_breaker_threshold, settings.upstream_breaker_cooldown),
+            {"requests": 0, "retries": 0, "throttled": 0, "errors": 0, "rejected": 0},
+        )
+        if len(self._hosts) > self.max_hosts:
+            self._evict()
+        return state
+
+    def _evict(self):
+        # Forget the least recently used host whose circuit is closed; forgetting an open
+        # breaker would let a failing host straight back in. Only if every host is failing
+        # does the oldest go regardless.
+        victim = next(
+            (h for h, (_, breaker, _) in self._hosts.items() if breaker.state == "closed"),
+            next(iter(self._hosts)),
+        )
+        del self._hosts[victim]
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        retries: Optional[int] = None,
+        gate: Optional[asyncio.Semaphore] = None,
+        attempt_timeout: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """GET url under the host's limits, retrying throttling, 5xx and transport errors.
+
+        `gate` (e.g. a global concurrency semaphore) is held only while a request is on the
+        wire, not while waiting for a token or backing off. `attempt_timeout` bounds each
+        attempt on the wire (a timed-out attempt is retried); token waits, backoff and
+        Retry-After pauses don't count against it. Returns the last response once retries
+        run out; raises CircuitOpenError or the last transport error or TimeoutError.
+        """
+        retries = settings.upstream_retries if retries is None else retries
+        host = urlparse(url).netloc
+        bucket, breaker, stats = self._host(host)
+        label = upstream_host_label(host)
+        attempt = 0
+        while True:
+            try:
+                breaker.check(host)
+            except CircuitOpenError:
+                stats["rejected"] += 1
+                raise
+            await bucket.acquire()
+            stats["requests"] += 1
+            try:
+                async with gate or contextlib.nullcontext():
+                    started = time.monotonic()
+                    r = await asyncio.wait_for(client.get(url, **kwargs), attempt_timeout)
+                    elapsed = time.monotonic() - started
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                upstream_request_seconds.observe(time.monotonic() - started, label, outcome)
+                stats["errors"] += 1
+                breaker.failure()
+                bucket.decrease(settings.upstream_decrease_factor)
+                if attempt == retries:
+                    raise
+                await self._backoff(stats, attempt)
+                attempt += 1
+                continue
+            upstream_request_seconds.observe(elapsed, label, str(r.status_code))
+
+            if r.status_code not in RETRY_STATUSES:
+                breaker.success()
+                if elapsed > settings.upstream_latency_target:
+                    # Slow answers are an early congestion signal; ease off more gently
+                    bucket.decrease(settings.upstream_slow_decrease_factor)
+                else:
+                    bucket.increase()
+                return r
+
+            retry_after = retry_after_seconds(r)
+            if r.status_code in THROTTLE_STATUSES:
+                stats["throttled"] += 1
+                bucket.decrease(settings.upstream_decrease_factor)
+                if retry_after is not None:
+                    bucket.pause(min(retry_after, settings.upstream_max_retry_after))
+            if r.status_code == 429:
+                # The host is up, we're just too fast: not a breaker failure
+                breaker.success()
+            else:
+                breaker.failure()
+            if attempt == retries or (retry_after or 0) > settings.upstream_max_retry_after:
+                return r
+            await r.aclose()
+            await self._backoff(stats, attempt, retry_after)
+            attempt += 1
+
+    async def _backoff(self, stats: dict, attempt: int, retry_after: Optional[float] = None):
+        stats["retries"] += 1
+        # Full jitter keeps retries from many callers from landing together
+        delay = random.uniform(0, min(settings.upstream_backoff_max, settings.upstream_backoff_base * 2 ** attempt))
+        await asyncio.sleep(max(delay, retry_after or 0))
+
+    def summary(self) -> dict:
+        return {
+            host: {**stats, "rate": round(bucket.rate, 3), "circuit": breaker.state}
+            for host, (bucket, breaker, stats) in list(self._hosts.items())
+        }
+
+upstream = UpstreamGovernor()
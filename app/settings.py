@@ -1,8 +1,110 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/app.db"
+    # Async driver URL for the request handlers; derived from database_url when unset
+    async_database_url: str | None = None
+
+    # Connection pool for server databases (ignored for SQLite)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # seconds; stay under server/proxy idle timeouts
+    db_pool_pre_ping: bool = True
+
+    # SQLite PRAGMAs applied to every new connection
+    sqlite_journal_mode: Literal["WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY"] = "WAL"
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_cache_size_kib: int = 20000
     seatgeek_client_id: str | None = None
+
+    # Shared outbound HTTP client pool
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_timeout: float = 20.0
+    http2: bool = False
+
+    # Persistent response cache for /scrape/url and /scrape/seatgeek
+    http_cache_enabled: bool = True
+    http_cache_path: str = "./data/http_cache.db"
+    http_cache_ttl: float = 300.0  # seconds before a stored response is revalidated
+    http_cache_max_entries: int = 5000
+    http_cache_max_bytes: int = 256 * 1024 * 1024
+
+    # Log EXPLAIN warnings for hot queries that full-scan a table at startup
+    index_check_on_startup: bool = False
+
+    # In-process cache for /insights reads; entries are also dropped when the underlying data changes
+    insights_cache_ttl: float = 60.0  # 0 disables
+    insights_cache_max_entries: int = 1024
+    insights_max_age: int = 0  # Cache-Control max-age for clients; 0 sends no-cache (always revalidate)
+
+    # In-process name -> id cache for artists and users (entries per kind; 0 disables)
+    identity_cache_max_entries: int = 100000
+
+    # Batch scraping
+    scrape_concurrency: int = 20
+    scrape_per_host_concurrency: int = 4
+    scrape_url_timeout: float = 20.0  # per attempt; retry waits and Retry-After pauses come on top
+
+    # /scrape/seatgeek/bulk page fan-out
+    seatgeek_bulk_concurrency: int = 8
+    seatgeek_bulk_max_pages: int = 100
+
+    # Hosts given their own label in /metrics (comma-separated); requests to any other host
+    # are reported as host="other" so scraped URLs can't blow up series cardinality
+    metrics_upstream_hosts: str = "api.seatgeek.com"
+
+    # /scrape/discover crawler
+    crawl_max_depth: int = 2
+    crawl_workers: int = 8
+    crawl_rate_per_host: float = 5.0  # requests per second
+    crawl_burst_per_host: float = 5.0
+
+    # Shared per-host limits for every upstream GET (AIMD-adjusted between min and max)
+    upstream_rate_per_host: float = 5.0  # starting requests per second
+    upstream_min_rate_per_host: float = 0.2
+    upstream_max_rate_per_host: float = 50.0
+    upstream_burst_per_host: float = 5.0
+    upstream_rate_increase: float = 0.1  # added per successful request
+    upstream_decrease_factor: float = 0.5  # on 429/503 and transport errors
+    upstream_slow_decrease_factor: float = 0.8  # on responses slower than the latency target
+    upstream_latency_target: float = 2.0  # seconds
+    upstream_retries: int = 3
+    upstream_backoff_base: float = 0.5  # seconds; full jitter, doubling per attempt
+    upstream_backoff_max: float = 10.0
+    upstream_max_retry_after: float = 30.0  # longer Retry-After values are returned, not waited on
+    upstream_breaker_threshold: int = 5  # consecutive failures before a host's circuit opens
+    upstream_breaker_cooldown: float = 30.0
+    upstream_max_hosts: int = 1024  # per-host state kept for this many hosts, least recently used evicted
+
+    # POST /interactions/batch
+    interactions_batch_max: int = 50000
+
+    # Write-behind ingest for POST /interactions: answer 202 and insert in micro-batches.
+    # Off by default; a client can also opt in per request with "Prefer: respond-async".
+    ingest_write_behind: bool = False
+    ingest_queue_max: int = 10000  # queued events before new ones get 503
+    ingest_batch_size: int = 500
+    ingest_flush_interval: float = 0.05  # seconds to gather a batch after the first event
+    ingest_journal_path: str | None = None  # e.g. ./data/ingest_journal.jsonl to survive restarts
+    ingest_shutdown_timeout: float = 30.0
+    ingest_write_retries: int = 10  # for locked/busy/connection errors, with backoff up to 5s
+
+    # Daily metrics backfill worker threads
+    backfill_workers: int = 4
+    attribution_chunk_rows: int = 200000  # interactions scored per chunk by the bulk attribution recompute
+
+    # Parquet snapshot of interactions for columnar analytics (python -m app.cli snapshot-interactions)
+    snapshot_dir: str = "./data/snapshots/interactions"
+    snapshot_batch_size: int = 50000
+
+    # HTML parsing pool ("thread" or "process"); 0 workers means the executor default
+    parse_executor: Literal["thread", "process"] = "thread"
+    parse_workers: int = 0
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,34 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one in-flight task"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            # The call runs as its own task so one caller disconnecting doesn't cancel it for the rest
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            self.started += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved in case every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,180 @@
+"""Columnar Parquet snapshot of the interactions table.
+
+Layout: <SNAPSHOT_DIR>/date=YYYY-MM-DD/part-<after>-<n>.parquet, one directory per day of
+interaction timestamp. Each run appends the interactions with an id above the
+"interactions_snapshot" watermark; interactions are never updated, so appended files are
+final. interaction_type and channel are dictionary-encoded.
+"""
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from sqlalchemy import func, select
+
+from .analytics import daily_metric_totals, score_attributions
+from .backfill import get_watermark, set_watermark
+from .crud import upsert_daily_metrics
+from .db import SessionLocal
+from .models import Interaction
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_WATERMARK = "interactions_snapshot"
+
+SCHEMA = pa.schema([
+    ("id", pa.int64()),
+    ("user_id", pa.int32()),
+    ("artist_id", pa.int32()),
+    ("concert_id", pa.int32()),
+    ("interaction_type", pa.dictionary(pa.int32(), pa.string())),
+    ("channel", pa.dictionary(pa.int32(), pa.string())),
+    ("timestamp", pa.timestamp("us")),
+    ("value", pa.float64()),
+])
+_PARTITIONING = ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+_PART_FILE = re.compile(r"^part-(\d+)-\d+\.parquet$")
+
+def _batches(db, after: int, high_water: int, batch_size: int) -> Iterator[pa.RecordBatch]:
+    columns = [getattr(Interaction, field.name) for field in SCHEMA]
+    result = db.execute(
+        select(*columns).where(
+            Interaction.id > after,
+            Interaction.id <= high_water,
+            Interaction.timestamp.isnot(None)
+        ).order_by(Interaction.id).execution_options(yield_per=batch_size)
+    )
+    for rows in result.partitions():
+        arrays = [
+            pa.array([row[i] for row in rows], type=field.type.value_type).dictionary_encode()
+            if pa.types.is_dictionary(field.type)
+            else pa.array([row[i] for row in rows], type=field.type)
+            for i, field in enumerate(SCHEMA)
+        ]
+        batch = pa.RecordBatch.from_arrays(arrays, schema=SCHEMA)
+        day = pc.cast(batch.column(SCHEMA.get_field_index("timestamp")), pa.date32())
+        yield batch.append_column("date", day)
+
+def _remove_unfinished(root: str, watermark: int):
+    # Files from a run that died before moving the watermark would duplicate rows
+    for directory, _, files in os.walk(root):
+        for name in files:
+            match = _PART_FILE.match(name)
+            if match and int(match.group(1)) >= watermark:
+                os.remove(os.path.join(directory, name))
+
+def snapshot_interactions(root: Optional[str] = None, batch_size: Optional[int] = None) -> dict:
+    """Append interactions newer than the watermark to the snapshot"""
+    root = root or settings.snapshot_dir
+    batch_size = batch_size or settings.snapshot_batch_size
+    db = SessionLocal()
+    try:
+        after = get_watermark(db, SNAPSHOT_WATERMARK)
+        high_water = db.query(func.max(Interaction.id)).scalar() or 0
+        if high_water <= after:
+            return {"rows": 0, "watermark": after}
+        os.makedirs(root, exist_ok=True)
+        _remove_unfinished(root, after)
+
+        written = 0
+        def counted(batches):
+            nonlocal written
+            for batch in batches:
+                written += batch.num_rows
+                yield batch
+        ds.write_dataset(
+            counted(_batches(db, after, high_water, batch_size)),
+            root,
+            schema=SCHEMA.append(pa.field("date", pa.date32())),
+            format="parquet",
+            partitioning=_PARTITIONING,
+            basename_template=f"part-{after}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        set_watermark(db, SNAPSHOT_WATERMARK, high_water)
+    finally:
+        db.close()
+    logger.info("Snapshot of %d interactions written to %s", written, root)
+    return {"rows": written, "watermark": high_water}
+
+def read_interactions(
+    columns: Optional[Sequence[str]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    root: Optional[str] = None,
+) -> pa.Table:
+    """Snapshot rows as an Arrow table; start/end are inclusive days and prune partitions"""
+    root = root or settings.snapshot_dir
+    if not os.path.isdir(root):
+        return SCHEMA.empty_table().select(list(columns) if columns else SCHEMA.names)
+    dataset = ds.dataset(root, format="parquet", partitioning=_PARTITIONING, schema=SCHEMA.append(
+        pa.field("date", pa.date32())
+    ))
+    condition = None
+    if start is not None:
+        condition = ds.field("date") >= pa.scalar(start.date(), pa.date32())
+    if end is not None:
+        before_end = ds.field("date") <= pa.scalar(end.date(), pa.date32())
+        condition = before_end if condition is None else condition & before_end
+    return dataset.to_table(columns=list(columns) if columns else SCHEMA.names, filter=condition)
+
+def _codes(table: pa.Table, name: str):
+    # Parts written by different runs carry their own dictionaries; unify before taking indices
+    column = table.column(name).unify_dictionaries().combine_chunks()
+    if not isinstance(column, pa.DictionaryArray):
+        column = column.dictionary_encode()
+    return column.indices.to_numpy(zero_copy_only=False), column.dictionary.to_pylist()
+
+def _numpy(table: pa.Table, name: str) -> np.ndarray:
+    return table.column(name).to_numpy()
+
+def daily_metrics_from_snapshot(days: List[datetime], root: Optional[str] = None) -> Dict[datetime, Dict[int, dict]]:
+    """Per-day, per-artist counts for days, computed from the snapshot with NumPy"""
+    if not days:
+        return {}
+    # new_users needs each pair's first-ever interaction, so read everything up to the last day
+    table = read_interactions(
+        ["user_id", "artist_id", "interaction_type", "timestamp", "value"], end=max(days), root=root
+    )
+    if table.num_rows == 0:
+        return {day: {} for day in days}
+    type_code, type_names = _codes(table, "interaction_type")
+    return daily_metric_totals(
+        _numpy(table, "user_id"), _numpy(table, "artist_id"), _numpy(table, "timestamp"),
+        type_code, type_names, _numpy(table, "value"), days
+    )
+
+def compute_daily_metrics_from_snapshot(
+    days: List[datetime],
+    root: Optional[str] = None,
+    progress: Optional[Callable[[int, int, datetime], None]] = None,
+):
+    """Recompute and store ArtistDailyMetrics for days from the snapshot in one pass"""
+    totals = daily_metrics_from_snapshot(days, root)
+    db = SessionLocal()
+    try:
+        for done, day in enumerate(days, 1):
+            upsert_daily_metrics(db, day, totals[day])
+            if progress:
+                progress(done, len(days), day)
+    finally:
+        db.close()
+
+def attributions_from_snapshot(root: Optional[str] = None) -> Dict[str, np.ndarray]:
+    """Attribution values for every (user, artist) pair, scored from the snapshot with NumPy"""
+    table = read_interactions(
+        ["id", "user_id", "artist_id", "interaction_type", "timestamp", "value"], root=root
+    )
+    if table.num_rows == 0:
+        return score_attributions(*(np.array([], dtype=np.int64) for _ in range(5)), [], np.array([]))
+    type_code, type_names = _codes(table, "interaction_type")
+    return score_attributions(
+        _numpy(table, "id"), _numpy(table, "user_id"), _numpy(table, "artist_id"),
+        _numpy(table, "timestamp"), type_code, type_names, _numpy(table, "value")
+    )
@@ -0,0 +1,234 @@
+"""In-process Prometheus-style metrics for GET /metrics.
+
+Histograms are per worker process and reset on restart; scrape every worker (or run
+one) for complete numbers. Gauges (queue depth, pools, upstream rates) are filled
+in by the /metrics handler at scrape time.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .settings import settings
+
+# Seconds; the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        # Observations come from parse and backfill threads as well as the event loop
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {value}" for key, value in values]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette appends the charset
+
+_UPSTREAM_HOSTS = frozenset(
+    host.strip().lower() for host in settings.metrics_upstream_hosts.split(",") if host.strip()
+)
+
+def upstream_host_label(host: str) -> str:
+    """Label for an upstream host: the host itself if listed in METRICS_UPSTREAM_HOSTS, else other"""
+    host = host.lower()
+    return host if host in _UPSTREAM_HOSTS else "other"
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to complete a request, including a streamed body",
+    ("method", "route", "status"),
+)
+http_request_sql_queries = Histogram(
+    "http_request_sql_queries", "SQL statements executed per request", ("route",), COUNT_BUCKETS
+)
+http_request_sql_seconds = Histogram(
+    "http_request_sql_seconds", "Time spent in SQL statements per request", ("route",)
+)
+sql_query_seconds = Histogram(
+    "sql_query_duration_seconds", "SQL statement execution time", ("operation",), FAST_BUCKETS
+)
+upstream_request_seconds = Histogram(
+    "upstream_request_duration_seconds", "Upstream GET time on the wire, per attempt", ("host", "status")
+)
+parse_seconds = Histogram(
+    "parse_duration_seconds", "Time spent parsing a page in the parse pool", ("function",), FAST_BUCKETS
+)
+parse_wait_seconds = Histogram(
+    "parse_queue_wait_seconds", "Parse pool overhead per page: waiting for a worker plus hand-off",
+    ("function",), FAST_BUCKETS
+)
+ingest_queue_pending = Gauge("ingest_queue_pending", "Interactions waiting in the write-behind queue")
+ingest_queue_capacity = Gauge("ingest_queue_capacity", "Write-behind queue size limit")
+db_pool_connections = Gauge("db_pool_connections", "Connection pool counters", ("engine", "state"))
+upstream_rate = Gauge(
+    "upstream_rate_per_host", "Current adaptive request rate (req/s); the slowest host for host=\"other\"", ("host",)
+)
+upstream_circuit = Gauge(
+    "upstream_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open; the worst for host=\"other\"",
+    ("host",),
+)
+
+# SQL work done on behalf of the current request: [statements, seconds]
+_request_sql: ContextVar[Optional[list]] = ContextVar("request_sql", default=None)
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    operation = statement.lstrip()[:6].upper()
+    sql_query_seconds.observe(elapsed, operation if operation in _SQL_OPERATIONS else "OTHER")
+    totals = _request_sql.get()
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += elapsed
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+def timed(fn, *args):
+    """(fn(*args), seconds it took); picklable, so it also works in a process pool"""
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording latency and SQL work per route template.
+
+    Timing stops when the last body chunk is sent, so streamed exports and NDJSON scrapes
+    are measured in full. Routes are labeled by path template ("/insights/artist/{artist_name}"),
+    never the raw path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        route = self._routes.get(endpoint)
+        if route is None:
+            route = next(
+                (r.path for r in scope["app"].routes if getattr(r, "endpoint", None) is endpoint), "unmatched"
+            )
+            self._routes[endpoint] = route
+        return route
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        totals = [0, 0.0]
+        token = _request_sql.set(totals)
+        status = 500
+        recorded = False
+
+        async def send_and_record(message):
+            nonlocal status, recorded
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                recorded = True
+                self._record(scope, status, started, totals)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            _request_sql.reset(token)
+            if not recorded:
+                # Raised, or the client went away mid-stream
+                self._record(scope, status, started, totals)
+
+    def _record(self, scope, status: int, started: float, totals: list):
+        route = self._route(scope)
+        http_request_seconds.observe(time.perf_counter() - started, scope["method"], route, str(status))
+        http_request_sql_queries.observe(totals[0], route)
+        http_request_sql_seconds.observe(totals[1], route)
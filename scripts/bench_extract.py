@@ -0,0 +1,85 @@
+"""Benchmark JSON-LD extraction: full BeautifulSoup DOM vs the streaming fast path.
+
+Usage: python scripts/bench_extract.py [--size-mb 4] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from bs4 import BeautifulSoup
+
+from app.extract import extract_events
+
+def soup_extract_events(html: str):
+    # The original per-endpoint loop, kept here as the baseline
+    soup = BeautifulSoup(html, "lxml")
+    events = []
+    for tag in soup.find_all("script", type="application/ld+json"):
+        try:
+            payload = json.loads(tag.string or tag.text or "{}")
+        except Exception:
+            continue
+        items = payload if isinstance(payload, list) else [payload]
+        for item in items:
+            if isinstance(item, dict) and item.get("@type") in ("Event", ["Event"]):
+                events.append(item)
+    return events
+
+def build_page(size_mb: float) -> str:
+    event = {
+        "@context": "https://schema.org",
+        "@type": "Event",
+        "name": "Benchmark Night",
+        "startDate": "2026-01-01T20:00",
+        "location": {"@type": "Place", "name": "The Hall"},
+    }
+    listing = (
+        '<div class="event-card"><a href="/events/{i}">Show {i}</a>'
+        '<span class="date">2026-01-01</span><p>Doors at 7pm. All ages.</p></div>\n'
+    )
+    parts = ["<!DOCTYPE html><html><head><title>Bench</title>"]
+    parts.append('<script type="application/ld+json">%s</script>' % json.dumps(event))
+    parts.append("</head><body>")
+    target = int(size_mb * 1024 * 1024)
+    size, i = 0, 0
+    while size < target:
+        chunk = listing.format(i=i)
+        if i % 500 == 0:
+            chunk += '<script type="application/ld+json">%s</script>' % json.dumps(event)
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    parts.append("</body></html>")
+    return "".join(parts)
+
+def bench(fn, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'events':>7} {'soup (ms)':>10} {'fast (ms)':>10} {'speedup':>8}")
+    for size_mb in args.size_mb:
+        html = build_page(size_mb)
+        assert len(extract_events(html)) == len(soup_extract_events(html))
+        soup_t = bench(soup_extract_events, html, args.repeat)
+        fast_t = bench(extract_events, html, args.repeat)
+        print(
+            f"{size_mb:>6.1f}MB {len(extract_events(html)):>7} "
+            f"{soup_t * 1000:>10.1f} {fast_t * 1000:>10.1f} {soup_t / fast_t:>7.1f}x"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+import pytest
+
+# app.db builds its engines at import time, so point it at a scratch database first
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="ticket-tests-"), "test.db")
+
+from app import identity_cache  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        # Cached ids would point at rows of the dropped tables
+        identity_cache.artist_ids.clear()
+        identity_cache.user_ids.clear()
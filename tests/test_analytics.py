@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.analytics import daily_metric_totals, encode
+from app.crud import compute_daily_metrics_for_date, get_or_create_artist, get_or_create_user, upsert_daily_metrics
+from app.models import ArtistDailyMetrics, Interaction
+
+DAYS = [datetime(2026, 4, day) for day in (1, 2, 3)]
+
+# (user, artist, type, value, day index, hour)
+EVENTS = [
+    ("u1", "a1", "view", None, 0, 9),
+    ("u1", "a1", "click", None, 0, 10),
+    ("u1", "a1", "purchase", 30.0, 0, 11),
+    ("u2", "a1", "view", None, 0, 23),
+    ("u2", "a2", "stream", 4.0, 0, 12),
+    ("u1", "a1", "view", None, 1, 0),
+    ("u3", "a1", "purchase", None, 1, 8),
+    ("u3", "a1", "purchase", 12.5, 1, 9),
+    ("u2", "a2", "social", None, 1, 14),
+    ("u3", "a2", "click", None, 1, 15),
+    ("u4", "a2", "unknown-type", 2.0, 2, 1),
+    ("u2", "a1", "click", None, 2, 5),
+    ("u1", "a2", "view", None, 2, 6),
+]
+
+def _load(db):
+    get_or_create_artist(db, "a3")  # no activity: must still get zero rows
+    for user_id, artist_name, kind, value, day, hour in EVENTS:
+        db.add(Interaction(
+            user_id=get_or_create_user(db, user_id).id,
+            artist_id=get_or_create_artist(db, artist_name).id,
+            interaction_type=kind,
+            channel="web",
+            value=value,
+            timestamp=DAYS[day] + timedelta(hours=hour),
+        ))
+    db.commit()
+
+def _stored(db):
+    return {
+        (m.date, m.artist_id): tuple(getattr(m, col) for col in (
+            "total_views", "total_clicks", "total_purchases", "total_streams", "total_social_engagements",
+            "ctr", "conversion_rate", "total_revenue", "avg_order_value", "unique_users", "new_users",
+        ))
+        for m in db.query(ArtistDailyMetrics)
+    }
+
+def _columns(db):
+    rows = db.query(
+        Interaction.user_id, Interaction.artist_id, Interaction.timestamp,
+        Interaction.interaction_type, Interaction.value
+    ).all()
+    type_code, type_names = encode([r.interaction_type for r in rows])
+    return (
+        np.array([r.user_id for r in rows]),
+        np.array([r.artist_id for r in rows]),
+        np.array([r.timestamp for r in rows], dtype="datetime64[us]"),
+        type_code,
+        type_names,
+        np.array([np.nan if r.value is None else r.value for r in rows]),
+    )
+
+def _assert_same(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, values in expected.items():
+        assert actual[key] == pytest.approx(values), key
+
+def _sql_metrics(db):
+    for day in DAYS:
+        compute_daily_metrics_for_date(db, day)
+    expected = _stored(db)
+    db.query(ArtistDailyMetrics).delete()
+    db.commit()
+    return expected
+
+def test_vectorized_daily_metrics_match_sql(db):
+    _load(db)
+    expected = _sql_metrics(db)
+
+    totals = daily_metric_totals(*_columns(db), DAYS)
+    for day in DAYS:
+        upsert_daily_metrics(db, day, totals[day])
+    _assert_same(_stored(db), expected)
+
+def test_snapshot_daily_metrics_match_sql(db, tmp_path):
+    pytest.importorskip("pyarrow")
+    from app.snapshot import compute_daily_metrics_from_snapshot, snapshot_interactions
+
+    _load(db)
+    expected = _sql_metrics(db)
+
+    assert snapshot_interactions(root=str(tmp_path))["rows"] == len(EVENTS)
+    compute_daily_metrics_from_snapshot(DAYS, root=str(tmp_path))
+    db.expire_all()
+    _assert_same(_stored(db), expected)
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.crud import (
+    create_interactions_bulk,
+    get_or_create_artist,
+    get_or_create_user,
+    rebuild_leaderboard,
+    recompute_attribution_for_user,
+    update_attribution_for_interaction,
+)
+from app.models import ArtistLeaderboard, Attribution, Interaction
+
+START = datetime(2026, 3, 1, 12, 0)
+
+# (user, artist, type, value, minutes after START); the last one is back-dated
+EVENTS = [
+    ("u1", "a1", "view", None, 0),
+    ("u1", "a1", "click", None, 5),
+    ("u2", "a1", "stream", 3.5, 6),
+    ("u1", "a2", "purchase", 40.0, 7),
+    ("u1", "a1", "purchase", 25.0, 10),
+    ("u3", "a2", "social", None, 11),
+    ("u2", "a1", "view", None, 12),
+    ("u2", "a2", "unknown-type", None, 13),
+    ("u1", "a1", "stream", 1.0, 20),
+    ("u3", "a2", "click", None, 21),
+    ("u1", "a1", "view", None, 2),
+]
+
+def _attributions(db):
+    return {
+        (a.user_id, a.artist_id): (a.score, a.interaction_count, a.total_value, a.last_interaction)
+        for a in db.query(Attribution)
+    }
+
+def _leaderboard(db):
+    return {
+        row.artist_id: (row.score_sum, row.user_count, row.total_value, row.avg_score)
+        for row in db.query(ArtistLeaderboard)
+    }
+
+def test_incremental_attribution_matches_full_recompute(db):
+    for user_id, artist_name, kind, value, minutes in EVENTS:
+        interaction = Interaction(
+            user_id=get_or_create_user(db, user_id).id,
+            artist_id=get_or_create_artist(db, artist_name).id,
+            interaction_type=kind,
+            channel="web",
+            value=value,
+            timestamp=START + timedelta(minutes=minutes),
+        )
+        db.add(interaction)
+        db.commit()
+        update_attribution_for_interaction(db, interaction)
+
+    incremental = _attributions(db)
+    running_board = _leaderboard(db)
+
+    for (user_id,) in db.query(Interaction.user_id).distinct():
+        recompute_attribution_for_user(db, user_id)
+    rebuild_leaderboard(db)
+    db.expire_all()
+
+    full = _attributions(db)
+    assert incremental.keys() == full.keys()
+    for pair, (score, count, value, last) in full.items():
+        assert incremental[pair] == (pytest.approx(score, abs=1e-12), count, pytest.approx(value), last)
+
+    rebuilt = _leaderboard(db)
+    assert running_board.keys() == rebuilt.keys()
+    for artist_id, expected in rebuilt.items():
+        assert running_board[artist_id] == pytest.approx(expected, abs=1e-12)
+
+def test_bulk_insert_stores_aware_timestamps_as_naive_utc(db):
+    eastern = timezone(timedelta(hours=-5))
+    events = [
+        {"user_id": "u1", "artist_name": "a1", "interaction_type": "view", "channel": "web",
+         "timestamp": datetime(2026, 3, 1, 23, 30, tzinfo=eastern)},
+        {"user_id": "u1", "artist_name": "a1", "interaction_type": "click", "channel": "web",
+         "timestamp": datetime(2026, 3, 1, 12, 0)},
+    ]
+    assert create_interactions_bulk(db, events) == 2
+    stored = [i.timestamp for i in db.query(Interaction).order_by(Interaction.id)]
+    assert stored == [datetime(2026, 3, 2, 4, 30), datetime(2026, 3, 1, 12, 0)]
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+
+from app.backfill import backfill_daily_metrics
+from app.crud import get_or_create_artist, get_or_create_user
+from app.models import ArtistDailyMetrics, Interaction
+
+DAYS = [datetime(2026, 5, day) for day in range(1, 6)]
+
+def _add(db, user_id, artist_name, kind, when, value=None):
+    db.add(Interaction(
+        user_id=get_or_create_user(db, user_id).id,
+        artist_id=get_or_create_artist(db, artist_name).id,
+        interaction_type=kind,
+        channel="web",
+        value=value,
+        timestamp=when,
+    ))
+    db.commit()
+
+def _stored(db):
+    db.expire_all()
+    return {
+        (m.date, m.artist_id): (m.total_views, m.total_clicks, m.total_purchases, m.total_revenue,
+                                m.unique_users, m.new_users)
+        for m in db.query(ArtistDailyMetrics)
+    }
+
+def test_incremental_backfill_recomputes_days_after_a_backdated_event(db):
+    _add(db, "u1", "a1", "view", DAYS[2] + timedelta(hours=3))
+    _add(db, "u1", "a1", "click", DAYS[4] + timedelta(hours=1))
+    _add(db, "u2", "a1", "purchase", DAYS[3] + timedelta(hours=2), 20.0)
+    _add(db, "u2", "a2", "view", DAYS[1] + timedelta(hours=5))
+    backfill_daily_metrics(DAYS[0], DAYS[-1], incremental=False)
+    backfill_daily_metrics()  # moves the watermark past everything so far
+
+    # u1's first a1 interaction moves from day 3 to day 1: day 3 loses a new user
+    _add(db, "u1", "a1", "view", DAYS[0] + timedelta(hours=8))
+    result = backfill_daily_metrics()
+    assert result["failed"] == []
+    incremental = _stored(db)
+
+    backfill_daily_metrics(DAYS[0], DAYS[-1], incremental=False)
+    assert incremental == _stored(db)
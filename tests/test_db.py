@@ -0,0 +1,73 @@
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from sqlalchemy import text
+
+from app import db as db_module
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_async_session_outside_the_app_does_not_block_exit():
+    script = textwrap.dedent("""
+        import asyncio
+        from sqlalchemy import text
+        from app.db import AsyncSessionLocal
+
+        async def main():
+            async with AsyncSessionLocal() as db:
+                await db.execute(text("select 1"))
+
+        asyncio.run(main())
+    """)
+    # No dispose(): a pooled aiosqlite connection's thread would keep the process alive
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=os.environ.copy(), timeout=60)
+    assert result.returncode == 0
+
+def test_async_pool_is_used_between_start_and_stop():
+    async def run():
+        db_module.start_async_pool()
+        try:
+            assert db_module.pool_stats()["async"]["class"] == "AsyncAdaptedQueuePool"
+            for _ in range(3):
+                async with db_module.AsyncSessionLocal() as session:
+                    assert (await session.execute(text("select 1"))).scalar() == 1
+            assert db_module.pool_stats()["async"]["checkedin"] == 1
+        finally:
+            await db_module.stop_async_pool()
+        assert db_module.pool_stats()["async"]["class"] == "NullPool"
+
+    asyncio.run(run())
+
+def _insert_without_unique_index(db, index_name: str, table: str, rows: list):
+    db.execute(text(f"DROP INDEX {index_name}"))
+    db.execute(text("INSERT INTO artists (id, name) VALUES (1, 'a1')"))
+    db.execute(text("INSERT INTO users (id, user_id) VALUES (1, 'u1')"))
+    for row in rows:
+        columns = ", ".join(row)
+        db.execute(text(f"INSERT INTO {table} ({columns}) VALUES ({', '.join(':' + c for c in row)})"), row)
+    db.commit()
+
+def test_ensure_indexes_drops_duplicate_daily_metrics(db):
+    rows = [
+        {"id": 1, "artist_id": 1, "date": "2025-01-01 00:00:00.000000", "total_views": 1},
+        {"id": 2, "artist_id": 1, "date": "2025-01-01 00:00:00.000000", "total_views": 2},
+        {"id": 3, "artist_id": 1, "date": "2025-01-02 00:00:00.000000", "total_views": 3},
+    ]
+    _insert_without_unique_index(db, "uq_artist_daily_metrics_artist_date", "artist_daily_metrics", rows)
+    db_module.ensure_indexes(db_module.engine)
+    remaining = db.execute(text("SELECT id, total_views FROM artist_daily_metrics ORDER BY id")).all()
+    assert [tuple(r) for r in remaining] == [(2, 2), (3, 3)]
+    indexes = db.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'")).scalars().all()
+    assert "uq_artist_daily_metrics_artist_date" in indexes
+
+def test_ensure_indexes_fails_loudly_on_duplicate_attributions(db):
+    rows = [{"id": n, "user_id": 1, "artist_id": 1, "score": 0.5} for n in (1, 2)]
+    _insert_without_unique_index(db, "uq_attributions_user_artist", "attributions", rows)
+    with pytest.raises(RuntimeError, match="uq_attributions_user_artist"):
+        db_module.ensure_indexes(db_module.engine)
+    assert db.execute(text("SELECT count(*) FROM attributions")).scalar() == 2
@@ -0,0 +1,27 @@
+import sqlite3
+
+import httpx
+
+from app.http_cache import ResponseCache
+
+def _response(size: int) -> httpx.Response:
+    return httpx.Response(200, content=b"x" * size)
+
+def test_eviction_keeps_both_bounds_and_running_totals(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ResponseCache(path, max_entries=5, max_bytes=1000)
+    for n in range(8):
+        cache.put(f"k{n}", "u", _response(100), ttl=60)
+    assert cache.summary()["entries"] == 5
+    # Replacing an entry with a bigger body pushes the byte bound, evicting the oldest
+    cache.put("k7", "u", _response(700), ttl=60)
+    summary = cache.summary()
+    assert (summary["entries"], summary["bytes"], summary["evictions"]) == (4, 1000, 4)
+    assert cache.get("k3") is None and cache.get("k6") is not None
+    cache.close()
+
+    # Totals survive a reopen and match the table
+    reopened = ResponseCache(path, max_entries=5, max_bytes=1000)
+    exact = sqlite3.connect(path).execute("SELECT COUNT(*), SUM(size) FROM responses").fetchone()
+    assert (reopened.summary()["entries"], reopened.summary()["bytes"]) == exact == (4, 1000)
+    reopened.close()
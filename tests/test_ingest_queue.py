@@ -0,0 +1,154 @@
+import asyncio
+import json
+import sqlite3
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.ingest_queue import IngestQueue
+
+def _event(n: int) -> dict:
+    return {"user_id": f"u{n}", "artist_name": "a1", "interaction_type": "view", "channel": "web"}
+
+class Recorder:
+    """Stand-in for write_interactions; `fail(rows)` may raise instead of writing"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.calls = []
+        self.written = []
+
+    async def __call__(self, rows):
+        self.calls.append(list(rows))
+        if self.fail is not None:
+            self.fail(rows)
+        self.written.extend(rows)
+        return len(rows)
+
+def _queue(write, journal=None, **kwargs) -> IngestQueue:
+    return IngestQueue(max_pending=100, batch_size=10, flush_interval=0.01, journal_path=journal, write=write, **kwargs)
+
+def test_replays_unacknowledged_journal_entries(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text("".join([
+        json.dumps({"seq": 1, "event": _event(1)}) + "\n",
+        json.dumps({"seq": 2, "event": _event(2)}) + "\n",
+        json.dumps({"ack": 1}) + "\n",
+        json.dumps({"seq": 3, "event": _event(3)}) + "\n",
+        '{"seq": 4, "ev',  # torn by a crash mid-write
+    ]))
+    write = Recorder()
+
+    async def run():
+        queue = _queue(write, str(journal))
+        await queue.start()
+        await queue.stop(5)
+
+    asyncio.run(run())
+    assert [row["user_id"] for row in write.written] == ["u2", "u3"]
+    assert journal.read_text() == ""
+
+def test_journal_is_acked_per_batch_and_truncated_when_drained(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    release = asyncio.Event()
+    write = Recorder()
+
+    async def gated(rows):
+        if write.calls:
+            await release.wait()
+        return await write(rows)
+
+    async def run():
+        queue = IngestQueue(max_pending=100, batch_size=1, flush_interval=0.01, journal_path=str(journal), write=gated)
+        await queue.start()
+        for n in range(3):
+            assert queue.submit(_event(n))
+        while len(write.calls) < 1:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        # First batch written while two are still queued: an ack line, not a truncation
+        assert [e["user_id"] for e in queue._read_journal()] == ["u1", "u2"]
+        release.set()
+        await queue.stop(5)
+
+    asyncio.run(run())
+    assert len(write.written) == 3
+    assert journal.read_text() == ""
+
+def test_rejected_batch_falls_back_to_one_row_at_a_time():
+    def fail(rows):
+        if any(row["user_id"] == "u1" for row in rows):
+            raise IntegrityError("INSERT", {}, sqlite3.IntegrityError("FOREIGN KEY constraint failed"))
+    write = Recorder(fail)
+
+    async def run():
+        queue = _queue(write)
+        await queue.start()
+        for n in range(3):
+            queue.submit(_event(n))
+        await queue.stop(5)
+        return queue
+
+    queue = asyncio.run(run())
+    assert sorted(row["user_id"] for row in write.written) == ["u0", "u2"]
+    assert queue.stats["dropped"] == 1
+    assert queue.stats["retries"] == 0
+
+def test_locked_database_is_retried():
+    errors = [OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))]
+
+    def fail(rows):
+        if errors:
+            raise errors.pop()
+    write = Recorder(fail)
+
+    async def run():
+        queue = _queue(write)
+        await queue.start()
+        for n in range(3):
+            queue.submit(_event(n))
+        await queue.stop(5)
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.stats["retries"] == 1
+    assert queue.stats["written"] == 3
+    assert len(write.calls) == 2
+
+def test_permanent_operational_error_does_not_wedge_the_queue():
+    broken = [True]
+
+    def fail(rows):
+        if broken[0]:
+            raise OperationalError("INSERT", {}, sqlite3.OperationalError("no such table: interactions"))
+    write = Recorder(fail)
+
+    async def run():
+        queue = _queue(write)
+        await queue.start()
+        queue.submit(_event(0))
+        await asyncio.wait_for(queue._queue.join(), 5)
+        broken[0] = False
+        queue.submit(_event(1))
+        await queue.stop(5)
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.stats["retries"] == 0
+    assert queue.stats["dropped"] == 1
+    assert [row["user_id"] for row in write.written] == ["u1"]
+
+def test_transient_errors_stop_retrying_after_the_limit():
+    def fail(rows):
+        raise OperationalError("INSERT", {}, sqlite3.OperationalError("database is locked"))
+    write = Recorder(fail)
+
+    async def run():
+        queue = _queue(write, write_retries=2)
+        await queue.start()
+        queue.submit(_event(0))
+        await queue.stop(5)
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.stats["retries"] == 2
+    assert queue.stats["dropped"] == 1
@@ -0,0 +1,95 @@
+import email.utils
+import time
+
+import httpx
+import pytest
+
+from app import ratelimit
+from app.ratelimit import CircuitBreaker, CircuitOpenError, UpstreamGovernor, retry_after_seconds
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+def test_breaker_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=30)
+    breaker.failure()
+    breaker.failure()
+    breaker.success()  # resets the run
+    breaker.failure()
+    breaker.failure()
+    assert breaker.state == "closed"
+    breaker.check("h")
+    breaker.failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.check("h")
+    assert exc.value.retry_in == pytest.approx(30)
+
+def test_breaker_half_open_lets_one_trial_through_per_cooldown(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+    breaker.check("h")
+    with pytest.raises(CircuitOpenError):
+        breaker.check("h")
+    # A trial that never reports back doesn't wedge the breaker
+    clock.now += 30
+    breaker.check("h")
+
+def test_breaker_failed_trial_reopens_and_successful_trial_closes(clock):
+    breaker = CircuitBreaker(threshold=1, cooldown=30)
+    breaker.failure()
+    clock.now += 30
+    breaker.check("h")
+    breaker.failure()
+    assert breaker.state == "open"
+    clock.now += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.check("h")
+    clock.now += 1
+    breaker.check("h")
+    breaker.success()
+    assert breaker.state == "closed"
+    breaker.check("h")
+    breaker.check("h")
+
+def _response(retry_after=None) -> httpx.Response:
+    return httpx.Response(429, headers={"Retry-After": retry_after} if retry_after is not None else {})
+
+def test_retry_after_seconds():
+    assert retry_after_seconds(_response("120")) == 120
+    assert retry_after_seconds(_response("1.5")) == 1.5
+    assert retry_after_seconds(_response("-5")) == 0
+    assert retry_after_seconds(_response()) is None
+    assert retry_after_seconds(_response("")) is None
+    assert retry_after_seconds(_response("soon")) is None
+
+def test_retry_after_http_date():
+    later = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert retry_after_seconds(_response(later)) == pytest.approx(60, abs=2)
+    assert retry_after_seconds(_response("Wed, 21 Oct 2015 07:28:00 GMT")) == 0
+
+def test_governor_evicts_least_recently_used_closed_hosts():
+    governor = UpstreamGovernor(max_hosts=3)
+    for host in ("a", "b", "c"):
+        governor._host(host)
+    # "a" is failing: keep its open breaker rather than let it straight back in
+    _, breaker, _ = governor._host("a")
+    for _ in range(breaker.threshold):
+        breaker.failure()
+    governor._host("b")
+    governor._host("c")
+    governor._host("d")
+    assert list(governor.summary()) == ["a", "c", "d"]
+    assert governor.summary()["a"]["circuit"] == "open"